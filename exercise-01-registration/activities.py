@@ -1,33 +1,50 @@
 import asyncio
+import os
 import random
-import time
+import secrets
 
 from temporalio import activity
+from temporalio.exceptions import ApplicationError
 from database import user_db
 from models import User
 
+# Failure simulation is on by default so the retry behavior is visible.
+# Set SIMULATE_FAILURES=0 to skip the random draws entirely.
+SIMULATE_FAILURES = os.getenv("SIMULATE_FAILURES", "1") == "1"
+
+# Private generator so failure draws don't contend on the shared `random` state.
+# Set RANDOM_SEED for reproducible runs.
+_rng = random.Random(os.getenv("RANDOM_SEED"))
+
 @activity.defn
 async def create_user_record(user: User) -> str:
     """Create user in database"""
-    print(f"Creating user record for {user.username}...")
+    activity.logger.info("Creating user record for %s...", user.username)
     await asyncio.sleep(1)  # Simulate database write
 
     # Simulate occasional database failures
-    if random.random() < 0.1:
+    if SIMULATE_FAILURES and _rng.random() < 0.1:
         raise Exception("Database connection timeout")
 
+    if user_db.user_exists(user.username):
+        raise ApplicationError(
+            f"Username already taken: {user.username}",
+            type="DuplicateUserError",
+            non_retryable=True,
+        )
+
     user_id = user_db.create_user(user.email, user.username, user.password)
-    print(f"✓ User created with ID: {user_id}")
+    activity.logger.info("✓ User created with ID: %s", user_id)
     return user_id
 
 @activity.defn
 async def send_welcome_email(user: User):
     """Send welcome email to new user"""
-    print(f"Sending welcome email to {user.email}...")
+    activity.logger.info("Sending welcome email to %s...", user.email)
     await asyncio.sleep(0.8)  # Simulate email sending
 
     # Simulate occasional email service failures
-    if random.random() < 0.15:
+    if SIMULATE_FAILURES and _rng.random() < 0.15:
         raise Exception("Email service unavailable")
 
     return True
@@ -35,13 +52,13 @@ async def send_welcome_email(user: User):
 @activity.defn
 async def send_verification_email(user: User, user_id: str):
     """Send verification link"""
-    print(f"Sending verification email to {user.email}...")
+    activity.logger.info("Sending verification email to %s...", user.email)
     await asyncio.sleep(0.8)
 
     # Simulate occasional email service failures
-    if random.random() < 0.15:
+    if SIMULATE_FAILURES and _rng.random() < 0.15:
         raise Exception("Email service unavailable")
 
-    verification_token = f"token_{user_id}_{int(time.time())}"
-    print(f"✓ Verification email sent with token: {verification_token}")
+    verification_token = secrets.token_urlsafe(24)
+    activity.logger.info("✓ Verification email sent with token: %s", verification_token)
     return verification_token
\ No newline at end of file
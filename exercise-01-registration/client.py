@@ -1,12 +1,28 @@
 import asyncio
 import uuid
+from typing import Optional
 
 from temporalio.client import Client
+from temporalio.common import RetryPolicy
 
+from converter import msgspec_data_converter
 from workflow import User, RegistrationWorkflow
 
+_client: Optional[Client] = None
+
+async def get_client() -> Client:
+    """Connect once and reuse the same client for every call"""
+    global _client
+    if _client is None:
+        _client = await Client.connect("localhost:7233", data_converter=msgspec_data_converter)
+    return _client
+
+def is_valid(user: User) -> bool:
+    """Cheap pre-check using the workflow's rules, so obviously bad input never reaches Temporal"""
+    return bool(user.email) and '@' in user.email and len(user.password) >= 8
+
 async def main():
-    client = await Client.connect("localhost:7233")
+    client = await get_client()
     # Try registering a few users
     users = [
         User(0,"alice@example.com","alice","secure123"),
@@ -14,17 +30,30 @@ async def main():
         User(0,"alice2@example.com","alice","another_password")
     ]
 
+    # Start every registration first, then wait on all of them together
+    handles = []
+    started_users = []
     for user in users:
+        if not is_valid(user):
+            print(f"✗ Skipping {user.username}: invalid email or password")
+            continue
+
         workflow_id = f"registration-{user.email}-{uuid.uuid4()}"
         handle = await client.start_workflow(
             RegistrationWorkflow.run,
-            args=[user],
+            user,
             id=workflow_id,
-            task_queue="user-registration-tasks"
+            task_queue="user-registration-tasks",
+            # Activities own the retries; re-running the whole workflow gains nothing
+            retry_policy=RetryPolicy(maximum_attempts=1),
         )
 
         print(f"Started workflow: {workflow_id}")
-        result = await handle.result()
+        handles.append(handle)
+        started_users.append(user)
+
+    results = await asyncio.gather(*(handle.result() for handle in handles))
+    for user, result in zip(started_users, results):
         print(f"✓ Registration result for {user.username}: {result}")
 
 # Usage example
@@ -0,0 +1,53 @@
+# converter.py
+# A Temporal data converter that uses msgspec for JSON payloads
+import dataclasses
+from typing import Any, Optional, Type
+
+import msgspec
+from temporalio.api.common.v1 import Payload
+from temporalio.converter import (
+    CompositePayloadConverter,
+    DataConverter,
+    DefaultPayloadConverter,
+    EncodingPayloadConverter,
+    JSONPlainPayloadConverter,
+)
+
+_encoder = msgspec.json.Encoder()
+
+
+class MsgspecJSONPayloadConverter(EncodingPayloadConverter):
+    """Drop-in replacement for the default json/plain converter"""
+
+    @property
+    def encoding(self) -> str:
+        return "json/plain"
+
+    def to_payload(self, value: Any) -> Optional[Payload]:
+        try:
+            data = _encoder.encode(value)
+        except TypeError:
+            return None
+        return Payload(metadata={"encoding": self.encoding.encode()}, data=data)
+
+    def from_payload(self, payload: Payload, type_hint: Optional[Type] = None) -> Any:
+        return msgspec.json.decode(payload.data, type=type_hint or Any)
+
+
+class MsgspecPayloadConverter(CompositePayloadConverter):
+    """Default converter chain with the JSON step swapped for msgspec"""
+
+    def __init__(self) -> None:
+        super().__init__(
+            *(
+                MsgspecJSONPayloadConverter()
+                if isinstance(c, JSONPlainPayloadConverter)
+                else c
+                for c in DefaultPayloadConverter.default_encoding_payload_converters
+            )
+        )
+
+
+msgspec_data_converter = dataclasses.replace(
+    DataConverter.default, payload_converter_class=MsgspecPayloadConverter
+)
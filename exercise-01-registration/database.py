@@ -1,25 +1,49 @@
 # inventory.py
 # This simulates an external database that activities can access
 import time
+from array import array
+from typing import Optional
 
 class UserDatabase:
     def __init__(self):
-        self._users = {}
+        # Column-per-field storage; a user's row is its position in each column
+        self._next_id = 0
+        self._index = {}  # user_id -> row
+        self._emails = []
+        self._usernames_col = []
+        self._passwords = []
+        self._verified = array('b')
+        self._created_at = array('d')
+        self._usernames = set()  # index for O(1) user_exists lookups
 
     def create_user(self, email: str, username: str, password: str) -> str:
-        user_id = f"user_{len(self._users) + 1}"
-        self._users[user_id] = {
-            'email': email,
-            'username': username,
-            'password': password,
-            'verified': False,
-            'created_at': time.time()
-        }
+        # Monotonic counter, so ids are never reused even if users get removed
+        self._next_id += 1
+        user_id = f"user_{self._next_id}"
+        self._index[user_id] = len(self._emails)
+        self._emails.append(email)
+        self._usernames_col.append(username)
+        self._passwords.append(password)
+        self._verified.append(False)
+        self._created_at.append(time.time())
+        self._usernames.add(username)
         return user_id
 
+    def get_user(self, user_id: str) -> Optional[dict]:
+        row = self._index.get(user_id)
+        if row is None:
+            return None
+        return {
+            'email': self._emails[row],
+            'username': self._usernames_col[row],
+            'password': self._passwords[row],
+            'verified': bool(self._verified[row]),
+            'created_at': self._created_at[row]
+        }
+
     def user_exists(self, username: str) -> bool:
-        return any(u['username'] == username for u in self._users.values())
+        return username in self._usernames
 
 
 # Global instance (in real life, this would be a real database)
-user_db = UserDatabase()
\ No newline at end of file
+user_db = UserDatabase()
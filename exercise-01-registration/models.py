@@ -1,8 +1,9 @@
-from dataclasses import dataclass
+import msgspec
 
-@dataclass
-class User:
+# msgspec Structs are slot-backed and encode much faster than dataclasses
+# through the default JSON converter (see converter.py)
+class User(msgspec.Struct):
     id: int
     email: str
     username: str
-    password: str
\ No newline at end of file
+    password: str
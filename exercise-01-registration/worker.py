@@ -1,15 +1,27 @@
 import asyncio
+import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 
 from temporalio.client import Client
 from temporalio.worker import Worker
 from activities import send_welcome_email, send_verification_email, create_user_record
 
+from converter import msgspec_data_converter
 from workflow import RegistrationWorkflow
 
 
+def configure_logging() -> QueueListener:
+    """Route log records through a queue so activities never block on stdout"""
+    log_queue = queue.SimpleQueue()
+    logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(log_queue)])
+    listener = QueueListener(log_queue, logging.StreamHandler())
+    listener.start()
+    return listener
+
 async def main():
-    client = await Client.connect("localhost:7233")
+    client = await Client.connect("localhost:7233", data_converter=msgspec_data_converter)
 
     try:
         worker = Worker(
@@ -25,4 +37,8 @@ async def main():
     await worker.run()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    listener = configure_logging()
+    try:
+        asyncio.run(main())
+    finally:
+        listener.stop()
\ No newline at end of file
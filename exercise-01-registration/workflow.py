@@ -1,15 +1,19 @@
+import asyncio
 from datetime import timedelta
 
 from temporalio import workflow
 from temporalio.common import RetryPolicy
 
-from models import User
+with workflow.unsafe.imports_passed_through():
+    from models import User
 
 DEFAULT_RETRY_POLICY = RetryPolicy(
     maximum_attempts=3,
     initial_interval=timedelta(seconds=1),
     maximum_interval=timedelta(seconds=10),
     backoff_coefficient=2.0,
+    # Bad input will never succeed, so don't spend retries on it
+    non_retryable_error_types=["ValueError", "DuplicateUserError"],
 )
 
 from activities import (
@@ -34,7 +38,7 @@ class RegistrationWorkflow:
 
     @workflow.run
     async def run(self, user: User):
-        """Main registration flow - runs all steps in sequence"""
+        """Main registration flow - emails are sent in parallel once the user exists"""
         workflow.logger.info(f"\n{'=' * 60}")
         workflow.logger.info(f"Starting registration for {user.username} ({user.email})")
         workflow.logger.info(f"{'=' * 60}\n")
@@ -51,21 +55,27 @@ class RegistrationWorkflow:
                 retry_policy=DEFAULT_RETRY_POLICY,
             )
 
-            # Step 3: Send welcome email
-            await workflow.execute_activity(
+            # Step 3 & 4: Send welcome and verification emails.
+            # Neither depends on the other, so run them concurrently.
+            welcome = workflow.start_activity(
                 send_welcome_email,
                 args=[user],
                 start_to_close_timeout=timedelta(minutes=5),
                 retry_policy=DEFAULT_RETRY_POLICY,
             )
-
-            # Step 4: Send verification email
-            verification_token = await workflow.execute_activity(
+            verification = workflow.start_activity(
                 send_verification_email,
                 args=[user, user_id],
                 start_to_close_timeout=timedelta(minutes=5),
                 retry_policy=DEFAULT_RETRY_POLICY,
             )
+            try:
+                _, verification_token = await asyncio.gather(welcome, verification)
+            except Exception:
+                # Registration has failed - stop the other email from retrying
+                welcome.cancel()
+                verification.cancel()
+                raise
 
             workflow.logger.info(f"\n{'=' * 60}")
             workflow.logger.info(f"✓ Registration complete for {user.username}!")
@@ -1,16 +1,38 @@
+import asyncio
+import base64
+import os
 import random
-import secrets
-import time
 
 from temporalio import activity
 
+# Failure simulation is on by default so the retry behavior is visible.
+# Set SIMULATE_FAILURES=0 to skip the random draws entirely.
+SIMULATE_FAILURES = os.getenv("SIMULATE_FAILURES", "1") == "1"
+
+# Private generator so failure draws don't contend on the shared `random` state.
+# Set RANDOM_SEED for reproducible runs.
+_rng = random.Random(os.getenv("RANDOM_SEED"))
+
+# Tokens are sliced from a batch of random bytes, one os.urandom call per 256 tokens
+TOKEN_BYTES = 32
+_RAND_BUFFER = b""
+_RAND_OFFSET = 0
+
+def _random_token() -> str:
+    """Same output as secrets.token_urlsafe(32), with the urandom syscall amortized"""
+    global _RAND_BUFFER, _RAND_OFFSET
+    if _RAND_OFFSET + TOKEN_BYTES > len(_RAND_BUFFER):
+        _RAND_BUFFER = os.urandom(TOKEN_BYTES * 256)
+        _RAND_OFFSET = 0
+    chunk = memoryview(_RAND_BUFFER)[_RAND_OFFSET:_RAND_OFFSET + TOKEN_BYTES]
+    _RAND_OFFSET += TOKEN_BYTES
+    return base64.urlsafe_b64encode(chunk).rstrip(b"=").decode("ascii")
+
 @activity.defn
 async def generate_token(email) -> str:
     """Generate a unique verification token"""
     print(f"Generating token for {email}...")
-    time.sleep(0.3)
-
-    token = secrets.token_urlsafe(32)
+    token = _random_token()
 
     print(f"✓ Token generated: {token[:16]}...")
     return token
@@ -19,10 +41,10 @@ async def generate_token(email) -> str:
 async def send_verification_email(email, token) -> str:
     """Send verification email"""
     print(f"Sending verification email to {email}...")
-    time.sleep(0.5)
+    await asyncio.sleep(0.5)
 
     # Simulate email service failures (10% failure rate)
-    if random.random() < 0.1:
+    if SIMULATE_FAILURES and _rng.random() < 0.1:
         raise Exception("Email service temporarily unavailable")
 
     verification_link = f"https://example.com/verify?token={token}"
@@ -14,14 +14,19 @@ async def main():
         "charlie@example.com"
     ]
 
-    for email in emails:
-        result = await client.execute_workflow(
+    # Submit every workflow up front, then wait on all of them together
+    handles = await asyncio.gather(*(
+        client.start_workflow(
             EmailVerificationWorkflow.run,
             args=[email],
             id=f"email-email_{email}-{uuid.uuid4()}",
             task_queue="email-verification-tasks",
         )
-        await asyncio.sleep(1)
+        for email in emails
+    ))
+
+    results = await asyncio.gather(*(handle.result() for handle in handles))
+    for email, result in zip(emails, results):
         print(f"✓ {email}: {result}")
 
 if __name__ == "__main__":
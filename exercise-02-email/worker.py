@@ -1,19 +1,34 @@
 import asyncio
 import sys
+
 from temporalio.worker import Worker
 from workflow import EmailVerificationWorkflow
 
 from temporalio.client import Client
+from temporalio.contrib.opentelemetry import TracingInterceptor
+from temporalio.runtime import PrometheusConfig, Runtime, TelemetryConfig
 from activities import generate_token,send_verification_email
 
+def create_runtime() -> Runtime:
+    """SDK metrics (activity latency, schedule-to-start, retries) scraped by Prometheus"""
+    return Runtime(telemetry=TelemetryConfig(
+        metrics=PrometheusConfig(bind_address="0.0.0.0:9091")
+    ))
+
 async def main():
     try:
-        client = await Client.connect("localhost:7233")
+        client = await Client.connect(
+            "localhost:7233",
+            runtime=create_runtime(),
+            interceptors=[TracingInterceptor()],
+        )
         worker = Worker(
             client,
             workflows=[EmailVerificationWorkflow],
             task_queue="email-verification-tasks",
-            activities=[generate_token,send_verification_email]
+            activities=[generate_token,send_verification_email],
+            max_concurrent_activities=200,
+            max_concurrent_workflow_tasks=100,
         )
 
         await worker.run()
@@ -1,23 +1,70 @@
 import asyncio
+import functools
+import os
 import random
 import time
+from typing import Dict, Tuple
+
+import numpy as np
+
+from circuit_breaker import CircuitBreaker
 from inventory import inventory_db
 from temporalio import activity
+from temporalio.exceptions import ApplicationError
 from models import Order, ProcessedPayment
 
+# Failure simulation is on by default so the retry behavior is visible.
+# Set SIMULATE_FAILURES=0 to skip the random draws entirely.
+SIMULATE_FAILURES = os.getenv("SIMULATE_FAILURES", "1") == "1"
+
+# Private generator so failure draws don't contend on the shared `random` state.
+# Set RANDOM_SEED for reproducible runs.
+_rng = random.Random(os.getenv("RANDOM_SEED"))
+
+# Shared by every payment attempt on this worker
+payment_breaker = CircuitBreaker("Payment gateway", fail_max=5, reset_timeout=10.0)
+
+# Stand-ins for the payment gateway's and shipping provider's idempotency
+# stores: a retry with the same key gets the original result back
+_payments_by_key: Dict[str, ProcessedPayment] = {}
+_shipments_by_key: Dict[str, str] = {}
+
+# Orders with more line items than this are totalled with numpy
+VECTORIZE_THRESHOLD = 64
+
+@functools.lru_cache(maxsize=1024)
+def _order_totals(items: Tuple[Tuple[int, float], ...]) -> Tuple[float, float]:
+    """(items_total, shipping_cost) for (quantity, price) pairs - memoized so
+    retries of the same order don't redo the arithmetic"""
+    if len(items) > VECTORIZE_THRESHOLD:
+        # Large (B2B) carts: let numpy do the arithmetic in one C loop
+        pairs = np.array(items, dtype=np.float64)
+        quantities, prices = pairs[:, 0], pairs[:, 1]
+        total_weight = float(quantities.sum()) * 2  # Assume 2lbs per item
+        items_total = float((quantities * prices).sum())
+    else:
+        # Single pass over the items for both weight and price
+        total_weight = 0.0
+        items_total = 0.0
+        for quantity, price in items:
+            total_weight += quantity * 2  # Assume 2lbs per item
+            items_total += price * quantity
+
+    base_cost = 5.99
+    weight_cost = total_weight * 0.50
+
+    return items_total, base_cost + weight_cost
+
 @activity.defn
 async def calculate_total_with_shipping(order: Order) -> float:
     """Calculate shipping cost"""
-    print(f"Calculating shipping...")
+    activity.logger.info("Calculating shipping...")
     await asyncio.sleep(0.5)
 
-    total_weight = sum(item.quantity * 2 for item in order.items)  # Assume 2lbs per item
-    base_cost = 5.99
-    weight_cost = total_weight * 0.50
-
-    shipping_cost = base_cost + weight_cost
-    print(f"✓ Shipping calculated: ${shipping_cost:.2f}")
-    items_total = sum(item.price * item.quantity for item in order.items)
+    items_total, shipping_cost = _order_totals(
+        tuple((item.quantity, item.price) for item in order.items)
+    )
+    activity.logger.info("✓ Shipping calculated: $%.2f", shipping_cost)
     total_amount = items_total + shipping_cost
 
     return total_amount
@@ -25,77 +72,113 @@ async def calculate_total_with_shipping(order: Order) -> float:
 @activity.defn
 async def validate_order(order: Order):
     """Validate order has required fields"""
-    print(f"Validating order {order.order_id}...")
+    activity.logger.info("Validating order %s...", order.order_id)
     await asyncio.sleep(0.3)
 
     if not order.order_id or not order.customer_email:
-        raise ValueError("Order ID and customer email required")
+        raise ApplicationError("Order ID and customer email required", type="ValidationError", non_retryable=True)
 
     if not order.items or len(order.items) == 0:
-        raise ValueError("Order must contain at least one item")
-
-    for item in order.items:
-        if not inventory_db.check_availability(item.sku, item.quantity):
-            raise ValueError(f"Unknown SKU or item not available: {item.sku}")
+        raise ApplicationError("Order must contain at least one item", type="ValidationError", non_retryable=True)
+
+    unavailable_sku = inventory_db.check_many(order.items)
+    if unavailable_sku is not None:
+        raise ApplicationError(
+            f"Unknown SKU or item not available: {unavailable_sku}",
+            type="ValidationError",
+            non_retryable=True,
+        )
 
-    print(f"✓ Order {order.order_id} validated")
+    activity.logger.info("✓ Order %s validated", order.order_id)
 
 @activity.defn
-async def process_payment(order: Order, amount: float):
-    """Process payment with retries"""
-    print(f"Processing payment for order {order.order_id}: ${amount}...")
+async def process_payment(order: Order, amount: float, idempotency_key: str) -> ProcessedPayment:
+    """Process payment (retries are handled by Temporal)"""
+    activity.logger.info("Processing payment for order %s: $%s...", order.order_id, amount)
+    payment_breaker.before_call()
+    await asyncio.sleep(1.0)  # Simulate payment gateway call (sends Idempotency-Key)
+
+    # The gateway already charged this key - hand back the original payment
+    existing = _payments_by_key.get(idempotency_key)
+    if existing is not None:
+        payment_breaker.record_success()
+        activity.logger.info("✓ Payment already processed: %s", existing.payment_id)
+        return existing
 
     # Simulate payment gateway failures (20% failure rate)
-    if random.random() < 0.2:
+    if SIMULATE_FAILURES and _rng.random() < 0.2:
+        payment_breaker.record_failure()
         raise Exception(f"Payment gateway timeout")
-
-    try:
-        payment_id = f"PAY_{order.order_id}_{int(time.time())}"
-        return ProcessedPayment(
-            payment_id = payment_id,
-            order_id = order.order_id,
-            amount = amount,
-            timestamp = str(time.time()),
-        )
-
-    except Exception as e:
-        print(f"✗ Payment attempt failed: {e}")
-        raise e
+    payment_breaker.record_success()
+
+    # Single attempt - Temporal's RetryPolicy schedules the next one
+    now = time.time()  # read the clock once so the id and timestamp agree
+    payment_id = f"PAY_{order.order_id}_{int(now)}"
+    payment = ProcessedPayment(
+        payment_id = payment_id,
+        order_id = order.order_id,
+        amount = amount,
+        timestamp = str(now),
+    )
+    _payments_by_key[idempotency_key] = payment
+    return payment
 
 @activity.defn
 async def reserve_inventory(order: Order):
-    """Reserve inventory with retry logic"""
-    print(f"Reserving inventory for order {order.order_id}...")
+    """Reserve inventory (retries are handled by Temporal)"""
+    activity.logger.info("Reserving inventory for order %s...", order.order_id)
+    await asyncio.sleep(0.8)  # Simulate inventory system call
 
-    # Check if we have enough stock
-    for item in order.items:
-        sku = item.sku
-        quantity = item.quantity
+    # Reserve every item in one call so the order is never partially reserved
+    reservation_id = inventory_db.reserve_many([(item.sku, item.quantity) for item in order.items])
+    activity.logger.info("✓ Inventory reserved: %s", reservation_id)
+    return reservation_id
 
-        if not inventory_db.check_availability(sku, quantity):
-            raise Exception(f"Insufficient inventory for {sku}: need {quantity}, have {inventory_db.get(sku, 0)}")
 
-        # Actually reserve the inventory
-        inventory_db.reserve_inventory(item.sku, item.quantity)
+@activity.defn
+async def release_inventory(order: Order, reservation_id: str) -> None:
+    """Compensation for reserve_inventory - put the reserved stock back"""
+    activity.logger.info("Releasing inventory reservation %s for order %s...", reservation_id, order.order_id)
+    await asyncio.sleep(0.8)  # Simulate inventory system call
+
+    # Keyed on the reservation, so a retried release doesn't put the stock back twice
+    if inventory_db.release(reservation_id):
+        activity.logger.info("✓ Inventory released: %s", reservation_id)
+    else:
+        activity.logger.info("Inventory reservation %s was already released", reservation_id)
 
-        reservation_id = f"RES_{order.order_id}_{int(time.time())}"
-        print(f"✓ Inventory reserved: {reservation_id}")
-        return reservation_id
 
-    return None
+@activity.defn
+async def refund_payment(payment_id: str) -> None:
+    """Compensation for process_payment - refund the charge"""
+    activity.logger.info("Refunding payment %s...", payment_id)
+    await asyncio.sleep(1.0)  # Simulate payment gateway call
+
+    # Forget the charge so a retried order is billed again rather than handed the refunded payment
+    for key, payment in list(_payments_by_key.items()):
+        if payment.payment_id == payment_id:
+            del _payments_by_key[key]
+    activity.logger.info("✓ Payment refunded: %s", payment_id)
 
 
 @activity.defn
-async def schedule_shipment(order: Order) -> str:
+async def schedule_shipment(order: Order, idempotency_key: str) -> str:
     """Schedule shipment with shipping provider"""
-    print(f"Scheduling shipment for order {order.order_id}...")
+    activity.logger.info("Scheduling shipment for order %s...", order.order_id)
+    await asyncio.sleep(1.2)  # Simulate shipping provider API call (sends Idempotency-Key)
+
+    existing = _shipments_by_key.get(idempotency_key)
+    if existing is not None:
+        activity.logger.info("✓ Shipment already scheduled: %s", existing)
+        return existing
 
     # Simulate shipping provider API failures (10% failure rate)
-    if random.random() < 0.4:
+    if SIMULATE_FAILURES and _rng.random() < 0.4:
         raise Exception(f"Shipping provider API error")
 
-    tracking_number = f"TRACK_{order.order_id}_{random.randint(10000, 99999)}"
+    tracking_number = f"TRACK_{order.order_id}_{_rng.randint(10000, 99999)}"
     estimated_delivery = time.time() + (7 * 24 * 60 * 60)  # 7 days from now
 
-    print(f"✓ Shipment scheduled: {tracking_number}. Estimated delivery time: {estimated_delivery}")
+    _shipments_by_key[idempotency_key] = tracking_number
+    activity.logger.info("✓ Shipment scheduled: %s. Estimated delivery time: %s", tracking_number, estimated_delivery)
     return tracking_number
\ No newline at end of file
@@ -1,7 +1,7 @@
 import asyncio
 import uuid
 from temporalio.client import Client
-from workflow import OrderProcessingWorkflow
+from workflow import BatchOrderProcessingWorkflow
 
 from models import Order, Item
 
@@ -29,15 +29,15 @@ async def main():
     ]
 
     client = await Client.connect("localhost:7233")
-    for order in orders:
-        handle = await client.start_workflow(
-            OrderProcessingWorkflow.run,
-            args=[order],
-            id=f"order-{order.order_id}-{uuid.uuid4()}",
-            task_queue="order-tasks",
-        )
-
-        await asyncio.sleep(2)  # Pause between orders
+    # One batch workflow fans the orders out as child workflows
+    results = await client.execute_workflow(
+        BatchOrderProcessingWorkflow.run,
+        orders,
+        id=f"order-batch-{uuid.uuid4()}",
+        task_queue="order-tasks",
+    )
+    for order, result in zip(orders, results):
+        print(f"✓ {order.order_id}: {result}")
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -1,5 +1,5 @@
 import uuid
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
 from temporalio.exceptions import ApplicationError
 
@@ -12,6 +12,8 @@ class InventoryDatabase:
             "SKU002": Item("SKU002", 30, 20.00),
             "SKU003": Item("SKU003", 100, 30.00),
         }
+        # reservation_id -> the (sku, quantity) pairs it took, so it can be released
+        self._reservations: Dict[str, List[Tuple[str, int]]] = {}
 
     def check_availability(self, sku: str, quantity: int) -> bool:
         """Check if we have enough stock"""
@@ -20,6 +22,15 @@ class InventoryDatabase:
             return False
         return item.quantity >= quantity
 
+    def check_many(self, items: List[Item]) -> Optional[str]:
+        """Return the first SKU we can't fill, or None if every item is in stock"""
+        inventory = self._inventory
+        for item in items:
+            stock = inventory.get(item.sku)
+            if stock is None or stock.quantity < item.quantity:
+                return item.sku
+        return None
+
     def get_quantity(self, sku: str) -> int:
         item = self._inventory.get(sku)
         return item.quantity if item else 0
@@ -30,7 +41,39 @@ class InventoryDatabase:
         if item and item.quantity >= quantity:
             item.quantity -= quantity
             return str(uuid.uuid4())
-        raise ApplicationError("Insufficient stock")
+        raise ApplicationError("Insufficient stock", type="InsufficientInventory", non_retryable=True)
+
+    def reserve_many(self, items: List[Tuple[str, int]]) -> str:
+        """Decrement stock for several SKUs at once - all or nothing"""
+        inventory = self._inventory
+        stock = []
+        for sku, quantity in items:
+            item = inventory.get(sku)
+            if item is None or item.quantity < quantity:
+                raise ApplicationError(
+                    f"Insufficient stock for {sku}",
+                    type="InsufficientInventory",
+                    non_retryable=True,
+                )
+            stock.append((item, quantity))
+
+        for item, quantity in stock:
+            item.quantity -= quantity
+        reservation_id = str(uuid.uuid4())
+        self._reservations[reservation_id] = list(items)
+        return reservation_id
+
+    def release(self, reservation_id: str) -> bool:
+        """Put a reservation's stock back - undoes reserve_many. False if it was already released"""
+        items = self._reservations.pop(reservation_id, None)
+        if items is None:
+            return False
+        inventory = self._inventory
+        for sku, quantity in items:
+            item = inventory.get(sku)
+            if item is not None:
+                item.quantity += quantity
+        return True
 
     def get_stock(self, sku: str) -> int:
         """Get current stock level"""
@@ -38,4 +81,5 @@ class InventoryDatabase:
         return item.quantity if item else 0
 
 # Global instance (in real life, this would be a real database)
-inventory_db = InventoryDatabase()
\ No newline at end of file
+inventory_db = InventoryDatabase()
+
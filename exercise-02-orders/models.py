@@ -2,29 +2,30 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import List, Optional
 
-@dataclass
+@dataclass(slots=True)
 class OrderResult:
     success: bool
     order_id: str
-    payment_id: str
-    tracking_number: str
+    # Unset when the order failed - a failed OrderResult must still decode
+    payment_id: Optional[str]
+    tracking_number: Optional[str]
     total: Optional[float]
-    error: Optional[Exception]
+    error: Optional[str]
 
-@dataclass
+@dataclass(slots=True)
 class Item:
     sku: str
     quantity: int
     price: float
 
-@dataclass
+@dataclass(slots=True)
 class Order:
     order_id: str
     items: List[Item]
     customer_email: str
     customer_address: str
 
-@dataclass
+@dataclass(slots=True)
 class ProcessedPayment:
     payment_id: str
     order_id: str
@@ -1,9 +1,14 @@
 # order_processing.py
+import logging
+import threading
 import time
 import random
 from datetime import datetime
 from enum import Enum
 
+log = logging.getLogger(__name__)
+_BANNER = "=" * 70
+
 class OrderStatus(Enum):
     PENDING = "pending"
     PAYMENT_PROCESSING = "payment_processing"
@@ -14,6 +19,9 @@ class OrderStatus(Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
+class InsufficientInventory(Exception):
+    pass
+
 class OrderProcessor:
     def __init__(self):
         self.orders = {}
@@ -22,12 +30,13 @@ class OrderProcessor:
             "SKU002": 30,
             "SKU003": 100,
         }
+        self._inventory_lock = threading.Lock()
         self.payments_processed = []
         self.shipments_scheduled = []
         
     def validate_order(self, order_id, items, customer_email):
         """Validate order has required fields"""
-        print(f"Validating order {order_id}...")
+        log.info("Validating order %s...", order_id)
         time.sleep(0.3)
         
         if not order_id or not customer_email:
@@ -42,12 +51,12 @@ class OrderProcessor:
             if item['quantity'] <= 0:
                 raise ValueError("Quantity must be positive")
         
-        print(f"✓ Order {order_id} validated")
+        log.info("✓ Order %s validated", order_id)
         return True
     
     def process_payment(self, order_id, customer_email, amount):
         """Process payment with retries"""
-        print(f"Processing payment for order {order_id}: ${amount}...")
+        log.info("Processing payment for order %s: $%s...", order_id, amount)
         
         # Naive retry logic built into the function
         max_attempts = 3
@@ -67,28 +76,20 @@ class OrderProcessor:
                     'timestamp': datetime.now()
                 })
                 
-                print(f"✓ Payment processed: {payment_id}")
+                log.info("✓ Payment processed: %s", payment_id)
                 return payment_id
                 
             except Exception as e:
-                print(f"✗ Payment attempt {attempt + 1} failed: {e}")
+                log.info("✗ Payment attempt %s failed: %s", attempt + 1, e)
                 if attempt < max_attempts - 1:
-                    print(f"Retrying in {(attempt + 1) * 2} seconds...")
+                    log.info("Retrying in %s seconds...", (attempt + 1) * 2)
                     time.sleep((attempt + 1) * 2)  # Exponential backoff
                 else:
                     raise Exception(f"Payment failed after {max_attempts} attempts")
     
     def reserve_inventory(self, order_id, items):
         """Reserve inventory with retry logic"""
-        print(f"Reserving inventory for order {order_id}...")
-        
-        # Check if we have enough stock
-        for item in items:
-            sku = item['sku']
-            quantity = item['quantity']
-            
-            if self.inventory.get(sku, 0) < quantity:
-                raise Exception(f"Insufficient inventory for {sku}: need {quantity}, have {self.inventory.get(sku, 0)}")
+        log.info("Reserving inventory for order %s...", order_id)
         
         # Simulate database operation with retries
         max_attempts = 3
@@ -101,24 +102,45 @@ class OrderProcessor:
                     raise Exception(f"Inventory system unavailable (attempt {attempt + 1})")
                 
                 # Actually reserve the inventory
-                for item in items:
-                    self.inventory[item['sku']] -= item['quantity']
+                self._reserve_atomically(items)
                 
                 reservation_id = f"RES_{order_id}_{int(time.time())}"
-                print(f"✓ Inventory reserved: {reservation_id}")
+                log.info("✓ Inventory reserved: %s", reservation_id)
                 return reservation_id
                 
+            except InsufficientInventory:
+                raise  # retrying won't create stock
             except Exception as e:
-                print(f"✗ Reservation attempt {attempt + 1} failed: {e}")
+                log.info("✗ Reservation attempt %s failed: %s", attempt + 1, e)
                 if attempt < max_attempts - 1:
-                    print(f"Retrying...")
+                    log.info("Retrying...")
                     time.sleep(1)
                 else:
                     raise Exception(f"Inventory reservation failed after {max_attempts} attempts")
     
+    def _reserve_atomically(self, items):
+        """Check and decrement each SKU under one lock, rolling back on a shortfall.
+        Same shape as a Redis DECRBY/INCRBY reservation, so there's no gap
+        between checking stock and taking it."""
+        reserved = []
+        with self._inventory_lock:
+            for item in items:
+                sku = item['sku']
+                quantity = item['quantity']
+                remaining = self.inventory.get(sku, 0) - quantity
+                if remaining < 0:
+                    for reserved_sku, reserved_quantity in reserved:
+                        self.inventory[reserved_sku] += reserved_quantity
+                    raise InsufficientInventory(
+                        f"Insufficient inventory for {sku}: need {quantity}, have {remaining + quantity}"
+                    )
+
+                self.inventory[sku] = remaining
+                reserved.append((sku, quantity))
+
     def calculate_shipping(self, items, customer_address):
         """Calculate shipping cost"""
-        print(f"Calculating shipping...")
+        log.info("Calculating shipping...")
         time.sleep(0.5)
         
         total_weight = sum(item['quantity'] * 2 for item in items)  # Assume 2lbs per item
@@ -126,12 +148,12 @@ class OrderProcessor:
         weight_cost = total_weight * 0.50
         
         shipping_cost = base_cost + weight_cost
-        print(f"✓ Shipping calculated: ${shipping_cost:.2f}")
+        log.info("✓ Shipping calculated: $%.2f", shipping_cost)
         return shipping_cost
     
     def schedule_shipment(self, order_id, items, customer_address, shipping_cost):
         """Schedule shipment with shipping provider"""
-        print(f"Scheduling shipment for order {order_id}...")
+        log.info("Scheduling shipment for order %s...", order_id)
         
         max_attempts = 3
         for attempt in range(max_attempts):
@@ -151,11 +173,11 @@ class OrderProcessor:
                     'estimated_delivery': estimated_delivery
                 })
                 
-                print(f"✓ Shipment scheduled: {tracking_number}")
+                log.info("✓ Shipment scheduled: %s", tracking_number)
                 return tracking_number
                 
             except Exception as e:
-                print(f"✗ Shipment scheduling attempt {attempt + 1} failed: {e}")
+                log.info("✗ Shipment scheduling attempt %s failed: %s", attempt + 1, e)
                 if attempt < max_attempts - 1:
                     time.sleep(2)
                 else:
@@ -163,11 +185,11 @@ class OrderProcessor:
     
     def process_order(self, order_id, items, customer_email, customer_address):
         """Main order processing flow - runs all steps"""
-        print(f"\n{'='*70}")
-        print(f"Processing order {order_id}")
-        print(f"Items: {len(items)} item(s)")
-        print(f"Customer: {customer_email}")
-        print(f"{'='*70}\n")
+        log.info("\n%s", _BANNER)
+        log.info("Processing order %s", order_id)
+        log.info("Items: %s item(s)", len(items))
+        log.info("Customer: %s", customer_email)
+        log.info("%s\n", _BANNER)
         
         try:
             # Step 1: Validate
@@ -183,7 +205,7 @@ class OrderProcessor:
             
             # Step 2: Calculate total
             total_amount = sum(item['price'] * item['quantity'] for item in items)
-            print(f"Order total: ${total_amount:.2f}")
+            log.info("Order total: $%.2f", total_amount)
             
             # Step 3: Process payment
             self.orders[order_id]['status'] = OrderStatus.PAYMENT_PROCESSING
@@ -204,12 +226,12 @@ class OrderProcessor:
             self.orders[order_id]['tracking_number'] = tracking_number
             self.orders[order_id]['status'] = OrderStatus.COMPLETED
             
-            print(f"\n{'='*70}")
-            print(f"✓ Order {order_id} completed successfully!")
-            print(f"Payment ID: {payment_id}")
-            print(f"Tracking: {tracking_number}")
-            print(f"Total: ${total_amount:.2f} + ${shipping_cost:.2f} shipping")
-            print(f"{'='*70}\n")
+            log.info("\n%s", _BANNER)
+            log.info("✓ Order %s completed successfully!", order_id)
+            log.info("Payment ID: %s", payment_id)
+            log.info("Tracking: %s", tracking_number)
+            log.info("Total: $%.2f + $%.2f shipping", total_amount, shipping_cost)
+            log.info("%s\n", _BANNER)
             
             return {
                 'success': True,
@@ -220,9 +242,9 @@ class OrderProcessor:
             }
             
         except Exception as e:
-            print(f"\n{'='*70}")
-            print(f"✗ Order {order_id} failed: {str(e)}")
-            print(f"{'='*70}\n")
+            log.info("\n%s", _BANNER)
+            log.info("✗ Order %s failed: %s", order_id, str(e))
+            log.info("%s\n", _BANNER)
             
             if order_id in self.orders:
                 self.orders[order_id]['status'] = OrderStatus.FAILED
@@ -240,6 +262,7 @@ class OrderProcessor:
 
 # Usage example
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     processor = OrderProcessor()
     
     # Sample orders
@@ -0,0 +1,35 @@
+import asyncio
+from typing import List
+
+from temporalio.converter import DataConverter
+
+from models import OrderResult
+
+
+def _round_trip(value, type_hint):
+    async def go():
+        payloads = await DataConverter.default.encode([value])
+        return (await DataConverter.default.decode(payloads, [type_hint]))[0]
+    return asyncio.run(go())
+
+
+def test_failed_order_result_round_trips():
+    failed = OrderResult(
+        success=False,
+        order_id="ORD-1",
+        payment_id=None,
+        tracking_number=None,
+        total=None,
+        error="Payment declined",
+    )
+
+    assert _round_trip(failed, OrderResult) == failed
+
+
+def test_batch_with_failed_order_round_trips():
+    batch = [
+        OrderResult(True, "ORD-1", "PAY-1", "TRACK-1", 42.0, None),
+        OrderResult(False, "ORD-2", None, None, None, "Out of stock"),
+    ]
+
+    assert _round_trip(batch, List[OrderResult]) == batch
@@ -1,26 +1,96 @@
 import asyncio
+import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 
 from temporalio.worker import Worker
 from temporalio.client import Client
-from workflow import OrderProcessingWorkflow
-from activities import validate_order,calculate_total_with_shipping, reserve_inventory, schedule_shipment, process_payment
+from temporalio.contrib.opentelemetry import TracingInterceptor
+from temporalio.runtime import PrometheusConfig, Runtime, TelemetryConfig
+from workflow import (
+    BatchOrderProcessingWorkflow,
+    OrderProcessingWorkflow,
+    INVENTORY_TASK_QUEUE,
+    PAYMENT_TASK_QUEUE,
+)
+from activities import (
+    validate_order,
+    calculate_total_with_shipping,
+    reserve_inventory,
+    release_inventory,
+    schedule_shipment,
+    process_payment,
+    refund_payment,
+)
 
-async def main():
-    try:
-        client = await Client.connect("localhost:7233")
-        worker = Worker(
+def configure_logging() -> QueueListener:
+    """Route log records through a queue so activities never block on stdout"""
+    log_queue = queue.SimpleQueue()
+    logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(log_queue)])
+    listener = QueueListener(log_queue, logging.StreamHandler())
+    listener.start()
+    return listener
+
+# Each role runs as its own process - `python worker.py [orders|payment|inventory]` -
+# so payment and inventory are bulkheaded from each other and from the order workflows.
+# Each process needs its own metrics port.
+METRICS_PORTS = {"orders": 9090, "payment": 9092, "inventory": 9093}
+
+def create_runtime(metrics_port: int) -> Runtime:
+    """SDK metrics (activity latency, schedule-to-start, retries) scraped by Prometheus"""
+    return Runtime(telemetry=TelemetryConfig(
+        metrics=PrometheusConfig(bind_address=f"0.0.0.0:{metrics_port}")
+    ))
+
+def build_worker(client: Client, role: str) -> Worker:
+    if role == "payment":
+        # Bulkhead: a bounded pool of payment slots
+        return Worker(
+            client,
+            task_queue=PAYMENT_TASK_QUEUE,
+            activities=[process_payment, refund_payment],
+            max_concurrent_activities=10,
+        )
+    if role == "inventory":
+        # Bulkhead: a bounded pool of inventory slots. validate_order checks stock,
+        # so it runs here, against the same inventory the reservations change
+        return Worker(
             client,
-            workflows=[OrderProcessingWorkflow],
-            task_queue="order-tasks",
-            activities=[validate_order,calculate_total_with_shipping,reserve_inventory, schedule_shipment, process_payment],
+            task_queue=INVENTORY_TASK_QUEUE,
+            activities=[validate_order, reserve_inventory, release_inventory],
+            max_concurrent_activities=20,
         )
+    return Worker(
+        client,
+        workflows=[OrderProcessingWorkflow, BatchOrderProcessingWorkflow],
+        task_queue="order-tasks",
+        activities=[calculate_total_with_shipping, schedule_shipment],
+        max_concurrent_activities=200,
+        max_concurrent_workflow_tasks=100,
+    )
+
+async def main(role: str):
+    try:
+        client = await Client.connect(
+            "localhost:7233",
+            runtime=create_runtime(METRICS_PORTS[role]),
+            interceptors=[TracingInterceptor()],
+        )
+        worker = build_worker(client, role)
+
+        await worker.run()
 
     except Exception as err:
         print(f"❌ ERROR: {err}", file=sys.stderr, flush=True)
         raise
 
-    await worker.run()
-
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    role = sys.argv[1] if len(sys.argv) > 1 else "orders"
+    if role not in METRICS_PORTS:
+        sys.exit(f"usage: python worker.py [{'|'.join(METRICS_PORTS)}]")
+    listener = configure_logging()
+    try:
+        asyncio.run(main(role))
+    finally:
+        listener.stop()
@@ -1,7 +1,10 @@
+import asyncio
 from datetime import timedelta
 
 from temporalio import workflow
 from temporalio.common import RetryPolicy
+from typing import List
+
 from models import Order, OrderResult
 
 with workflow.unsafe.imports_passed_through():
@@ -10,14 +13,26 @@ with workflow.unsafe.imports_passed_through():
         calculate_total_with_shipping,
         process_payment,
         reserve_inventory,
+        release_inventory,
+        refund_payment,
         schedule_shipment
     )
 
+_BANNER = "=" * 70
+
+# Payment and inventory run on their own task queues (and workers) so a slow
+# dependency can only exhaust its own slots - see worker.py
+PAYMENT_TASK_QUEUE = "payment-tasks"
+INVENTORY_TASK_QUEUE = "inventory-tasks"
+
+# Temporal waits out the backoff between attempts without holding a worker slot
 DEFAULT_RETRY_POLICY = RetryPolicy(
-    maximum_attempts=3,
+    maximum_attempts=5,
     initial_interval=timedelta(seconds=1),
-    maximum_interval=timedelta(seconds=10),
+    maximum_interval=timedelta(seconds=30),
     backoff_coefficient=2.0,
+    # Bad input and missing stock won't fix themselves; only transient failures are retried
+    non_retryable_error_types=["ValueError", "ValidationError", "InsufficientInventory"],
 )
 
 @workflow.defn
@@ -26,63 +41,84 @@ class OrderProcessingWorkflow:
     @workflow.run
     async def run(self, order: Order):
         """Main order processing flow - runs all steps"""
-        workflow.logger.info(f"\n{'=' * 70}")
-        workflow.logger.info(f"Processing order {order.order_id}")
-        workflow.logger.info(f"Items: {len(order.items)} item(s)")
-        workflow.logger.info(f"Customer: {order.customer_email}")
-        workflow.logger.info(f"{'=' * 70}\n")
+        workflow.logger.info("\n%s", _BANNER)
+        workflow.logger.info("Processing order %s", order.order_id)
+        workflow.logger.info("Items: %s item(s)", len(order.items))
+        workflow.logger.info("Customer: %s", order.customer_email)
+        workflow.logger.info("%s\n", _BANNER)
+
+        # Saga: each undoable step is recorded when it starts, because steps run in
+        # parallel and may still be running when a sibling fails. Compensations are
+        # only built on failure, for the recorded steps that actually completed.
+        in_flight = []  # (future, compensating activity, task_queue, args for a given result)
 
         try:
-            # Step 1: Validate
+            # Step 1: Validate - on the inventory queue, where the stock it checks lives
             await workflow.execute_activity(
                 validate_order,
                 args=[order],
+                task_queue=INVENTORY_TASK_QUEUE,
                 start_to_close_timeout=timedelta(minutes=5),
                 retry_policy=DEFAULT_RETRY_POLICY,
             )
 
-            # Step 2: Calculate total
-            total_amount = await workflow.execute_activity(
+            # Step 2: Calculate total and reserve inventory - neither depends on the other
+            total_future = workflow.start_activity(
                 calculate_total_with_shipping,
                 args=[order],
                 start_to_close_timeout=timedelta(minutes=5),
                 retry_policy=DEFAULT_RETRY_POLICY,
             )
-            workflow.logger.info(f"Order total: ${total_amount:.2f}")
-
-            # Step 3: Process payment
-            payment_id = await workflow.execute_activity(
-                process_payment,
-                args=[order, total_amount],
+            reservation_future = workflow.start_activity(
+                reserve_inventory,
+                args=[order],
+                task_queue=INVENTORY_TASK_QUEUE,
                 start_to_close_timeout=timedelta(minutes=5),
                 retry_policy=DEFAULT_RETRY_POLICY,
             )
+            in_flight.append((
+                reservation_future, release_inventory, INVENTORY_TASK_QUEUE,
+                lambda reservation_id: [order, reservation_id],
+            ))
 
-            # Step 4: Reserve inventory
-            reservation_id = await workflow.execute_activity(
-                reserve_inventory,
-                args=[order],
+            total_amount = await total_future
+            workflow.logger.info("Order total: $%.2f", total_amount)
+
+            # Step 3: Process payment as soon as the total is known
+            payment_future = workflow.start_activity(
+                process_payment,
+                # Stable across retries, so the gateway can de-duplicate the charge
+                args=[order, total_amount, f"{order.order_id}-payment"],
+                task_queue=PAYMENT_TASK_QUEUE,
                 start_to_close_timeout=timedelta(minutes=5),
                 retry_policy=DEFAULT_RETRY_POLICY,
             )
-            workflow.logger.info(f"\n{'=' * 70}")
-            workflow.logger.info(f"Inventory Reservation successful: {reservation_id}")
-            workflow.logger.info(f"\n{'=' * 70}\n")
-
-            # Step 6: Schedule shipment
+            in_flight.append((
+                payment_future, refund_payment, PAYMENT_TASK_QUEUE,
+                lambda payment: [payment.payment_id],
+            ))
+
+            # Step 4: Wait for the reservation and the payment together
+            reservation_id, payment = await asyncio.gather(reservation_future, payment_future)
+            payment_id = payment.payment_id
+            workflow.logger.info("\n%s", _BANNER)
+            workflow.logger.info("Inventory Reservation successful: %s", reservation_id)
+            workflow.logger.info("\n%s\n", _BANNER)
+
+            # Step 5: Schedule shipment
             tracking_number = await workflow.execute_activity(
                 schedule_shipment,
-                args=[order],
+                args=[order, f"{order.order_id}-shipment"],
                 start_to_close_timeout=timedelta(minutes=5),
                 retry_policy=DEFAULT_RETRY_POLICY,
             )
 
-            workflow.logger.info(f"\n{'=' * 70}")
-            workflow.logger.info(f"✓ Order {order.order_id} completed successfully!")
-            workflow.logger.info(f"Payment ID: {payment_id}")
-            workflow.logger.info(f"Tracking: {tracking_number}")
-            workflow.logger.info(f"Total: ${total_amount:.2f}")
-            workflow.logger.info(f"{'=' * 70}\n")
+            workflow.logger.info("\n%s", _BANNER)
+            workflow.logger.info("✓ Order %s completed successfully!", order.order_id)
+            workflow.logger.info("Payment ID: %s", payment_id)
+            workflow.logger.info("Tracking: %s", tracking_number)
+            workflow.logger.info("Total: $%.2f", total_amount)
+            workflow.logger.info("%s\n", _BANNER)
 
             return OrderResult(
                 success = True,
@@ -94,12 +130,30 @@ class OrderProcessingWorkflow:
             )
 
         except Exception as e:
-            workflow.logger.info(f"\n{'=' * 70}")
-            workflow.logger.info(f"✗ Order {order.order_id} failed: {str(e)}")
-            workflow.logger.info(f"{'=' * 70}\n")
-
-            # TODO: We should rollback payment and inventory here!
-            # But this code doesn't handle that...
+            workflow.logger.info("\n%s", _BANNER)
+            workflow.logger.info("✗ Order %s failed: %s", order.order_id, e)
+            workflow.logger.info("%s\n", _BANNER)
+
+            # Let parallel steps finish so anything they did gets undone too
+            await asyncio.gather(*(future for future, *_ in in_flight), return_exceptions=True)
+            compensations = []  # (activity, args, task_queue), in the order the steps started
+            for future, compensation, task_queue, make_args in in_flight:
+                if not future.cancelled() and future.exception() is None:
+                    compensations.append((compensation, make_args(future.result()), task_queue))
+
+            # Undo completed steps in reverse order
+            for compensation, args, task_queue in reversed(compensations):
+                try:
+                    await workflow.execute_activity(
+                        compensation,
+                        args=args,
+                        task_queue=task_queue,
+                        start_to_close_timeout=timedelta(minutes=5),
+                        retry_policy=DEFAULT_RETRY_POLICY,
+                    )
+                except Exception as comp_error:
+                    workflow.logger.error("Compensation %s failed for order %s: %s",
+                                          compensation.__name__, order.order_id, comp_error)
 
             return OrderResult(
                 success=False,
@@ -110,3 +164,23 @@ class OrderProcessingWorkflow:
                 error=str(e)
             )
 
+
+@workflow.defn
+class BatchOrderProcessingWorkflow:
+
+    @workflow.run
+    async def run(self, orders: List[Order]) -> List[OrderResult]:
+        """Process a batch of orders as concurrent child workflows"""
+        workflow.logger.info("Processing batch of %s order(s)", len(orders))
+
+        batch_id = workflow.info().workflow_id
+        handles = [
+            await workflow.start_child_workflow(
+                OrderProcessingWorkflow.run,
+                order,
+                id=f"{batch_id}-{order.order_id}",
+            )
+            for order in orders
+        ]
+
+        return list(await asyncio.gather(*handles))
@@ -1,65 +1,107 @@
 import asyncio
+import os
 import random
+import time
 import uuid
-from typing import List
+from typing import Callable, Dict, List, Tuple
 
 from temporalio import activity
 from temporalio.exceptions import ApplicationError
 
+from circuit_breaker import CircuitBreaker
 from database import HotelData, Room, ReservationRequest, ReservationResult
 
+# Private generator so failure draws don't contend on the shared `random` state.
+# Set RANDOM_SEED for reproducible runs.
+_rng = random.Random(os.getenv("RANDOM_SEED"))
+
+# Shared by every payment attempt on this worker
+payment_breaker = CircuitBreaker("Payment gateway", fail_max=5, reset_timeout=10.0)
+
+# One hotel per worker process, so a room assigned by one activity
+# is unavailable to the next (in real life, this would be a real database)
+_HOTEL = HotelData()
+
+
+class _TTLCache:
+    """Tiny per-key cache whose entries expire after ttl seconds"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, list]] = {}
+
+    def get_or_compute(self, key: str, compute: Callable[[], list]) -> list:
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None and now - entry[0] < self.ttl:
+            return entry[1]
+        value = compute()
+        self._entries[key] = (now, value)
+        return value
+
+    def invalidate(self, key: str):
+        self._entries.pop(key, None)
+
+
+_AVAIL_CACHE = _TTLCache(ttl=1.0)
 
 @activity.defn
 async def check_room_availability(res: ReservationRequest) -> List[Room]:
-    hotel = HotelData()
     await asyncio.sleep(0.5)
 
     # This is very naive--basically only checks for whether it's available "today", not the dates themselves.
     #   It works for now, but any iteration would require changing from a boolean to basically incorporating
     #   a mini-calendar into each Room
-    return [r for r in hotel.rooms
-        if r.room_type == res.room_type and r.is_available]
+    return _AVAIL_CACHE.get_or_compute(
+        res.room_type,
+        lambda: _HOTEL.available_rooms(res.room_type),
+    )
 
 @activity.defn
 async def collect_payment(total_price: float) -> str:
     # Process payment with NAIVE RETRY LOGIC
     activity.logger.info(f"Processing payment of ${total_price:.2f}...")
+    payment_breaker.before_call()
 
     await asyncio.sleep(0.5)
 
     # Simulate payment gateway failures (20% failure rate)
-    if random.random() < 0.2:
+    if _rng.random() < 0.2:
+        payment_breaker.record_failure()
         raise ApplicationError("Payment gateway timeout")
+    payment_breaker.record_success()
 
     return f"PAY-{uuid.uuid4().hex[:12]}"
 
 @activity.defn
-async def assign_room(available_rooms: List[Room]) -> str:
+async def assign_room(room_type: str) -> str:
     await asyncio.sleep(0.3)
 
     # Simulate occasional assignment failures (15% failure rate)
-    if random.random() < 0.15:
+    if _rng.random() < 0.15:
         raise Exception("Room assignment system error")
 
-    selected_room = available_rooms[0]
-    selected_room.is_available = False
+    # Pop from the shared hotel's free list rather than trusting an earlier availability
+    # snapshot - concurrent reservations would all pick the same "first" room from it
+    selected_room = _HOTEL.assign_next(room_type)
+    _AVAIL_CACHE.invalidate(selected_room.room_type)
 
     return selected_room.room_number
 
 @activity.defn
 async def send_email_notification(res: ReservationRequest, res_result: ReservationResult):
         # Simulate email service failures (10% failure rate)
-        if random.random() < 0.1:
+        if _rng.random() < 0.1:
             raise Exception("Email service unavailable")
 
-        confirmation_message = await build_confirmation_message()
+        confirmation_message = await build_confirmation_message(res, res_result)
         await asyncio.sleep(2) # here's where we pretend we're sending the message
         activity.logger.info(f"✓ Confirmation email sent to {res.guest_email}")
 
 @activity.defn
 async def send_sms_notification(res: ReservationRequest, res_result: ReservationResult):
         # Simulate email service failures (10% failure rate)
-        if random.random() < 0.1:
+        if _rng.random() < 0.1:
             raise Exception("SMS service unavailable")
 
         confirmation_message = await build_confirmation_message(res, res_result)
@@ -70,7 +112,7 @@ async def send_sms_notification(res: ReservationRequest, res_result: Reservation
 async def front_desk_confirmation(res: ReservationRequest, res_result: ReservationResult):
         # Simulate email service failures (10% failure rate)
 
-        confirmation_message = build_confirmation_message(res, res_result)
+        confirmation_message = await build_confirmation_message(res, res_result)
         await asyncio.sleep(2) # here's where we pretend to assign the confirmation to the front desk
         activity.logger.info(f"✓ Front desk will call to notify {res.guest_mobile}")
 
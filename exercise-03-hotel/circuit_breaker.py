@@ -0,0 +1,60 @@
+# circuit_breaker.py
+# Stops calling a dependency that keeps failing, instead of letting every
+# workflow burn its retries against it.
+# Each exercise keeps its own copy: exercises are run from their own directory
+# and never import from one another.
+import logging
+import time
+
+from temporalio.exceptions import ApplicationError
+
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    def __init__(self, name: str, fail_max: int = 5, reset_timeout: float = 10.0):
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        # When the half-open trial call was let through; None while no trial is running
+        self._trial_started_at = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        """Fail fast while the circuit is open; half-open lets one trial call through"""
+        state = self.state
+        if state == "half-open":
+            now = time.monotonic()
+            # A trial that never reported back (e.g. a cancelled activity) expires
+            # after reset_timeout, so the breaker can't stay stuck half-open
+            if self._trial_started_at is None or now - self._trial_started_at >= self.reset_timeout:
+                self._trial_started_at = now
+                return
+        if state != "closed":
+            raise ApplicationError(
+                f"{self.name} circuit is {state} - failing fast",
+                type="CircuitOpen",
+                non_retryable=True,
+            )
+
+    def record_success(self):
+        if self._opened_at is not None:
+            logger.info("%s circuit closed", self.name)
+        self._failures = 0
+        self._opened_at = None
+        self._trial_started_at = None
+
+    def record_failure(self):
+        self._failures += 1
+        if self.state == "half-open" or self._failures >= self.fail_max:
+            self._opened_at = time.monotonic()
+            self._trial_started_at = None
+            logger.warning("%s circuit opened after %d failure(s)", self.name, self._failures)
@@ -39,14 +39,20 @@ async def main():
 
     client = await Client.connect("localhost:7233")
 
-    for reservation in reservations:
-        await client.execute_workflow(
+    # Submit every reservation up front, then wait on all of them together
+    handles = await asyncio.gather(*(
+        client.start_workflow(
             HotelReservationWorkflow.run,
             args=[reservation],
             id = f"RES-{uuid.uuid4()}",
             task_queue="reservation-queue",
         )
-        await asyncio.sleep(2)
+        for reservation in reservations
+    ))
+
+    results = await asyncio.gather(*(handle.result() for handle in handles))
+    for reservation, result in zip(reservations, results):
+        print(f"✓ {reservation.guest_name}: {result}")
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -1,15 +1,26 @@
+from collections import defaultdict, deque
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Deque, Dict, List, Optional
 
+from temporalio.exceptions import ApplicationError
 
-@dataclass
+
+# Nightly rate per room type
+ROOM_RATES = {
+    'standard': 100.00,
+    'deluxe': 150.00,
+    'suite': 250.00,
+}
+
+
+@dataclass(slots=True)
 class Room:
     room_number: str
     room_type: str
     is_available: bool
 
-@dataclass
+@dataclass(slots=True)
 class ReservationRequest:
     guest_name: str
     guest_email: str
@@ -19,7 +30,7 @@ class ReservationRequest:
     check_out: str
     payment_method: str
 
-@dataclass
+@dataclass(slots=True)
 class ReservationResult:
     success: bool
     reservation_id: str
@@ -43,9 +54,22 @@ class HotelData:
             Room('301', 'suites', True),
         ]
 
-        self.rates = {
-            'standard': 100.00,
-            'deluxe': 150.00,
-            'suite': 250.00,
-        }
+        # Free rooms queue up per type, so availability checks and assignment don't scan every room
+        self.available_by_type: Dict[str, Deque[Room]] = defaultdict(deque)
+        for room in self.rooms:
+            if room.is_available:
+                self.available_by_type[room.room_type].append(room)
+
+        self.rates = dict(ROOM_RATES)
+
+    def available_rooms(self, room_type: str) -> List[Room]:
+        return list(self.available_by_type.get(room_type, ()))
 
+    def assign_next(self, room_type: str) -> Room:
+        """Take the first free room of this type - popped, so no one else can get it"""
+        free = self.available_by_type.get(room_type)
+        if not free:
+            raise ApplicationError(f"No {room_type} rooms available", type="NoAvailability", non_retryable=True)
+        room = free.popleft()
+        room.is_available = False
+        return room
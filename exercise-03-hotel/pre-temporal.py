@@ -1,9 +1,11 @@
 # hotel_reservation.py - Original messy implementation
+import asyncio
 import time
 import random
+from collections import defaultdict, deque
 from datetime import datetime, timedelta
 from dataclasses import dataclass
-from typing import List, Dict
+from typing import Deque, List, Dict
 
 # Room pricing
 ROOM_PRICES = {
@@ -34,7 +36,15 @@ class HotelReservationSystem:
             Room('301', 'suite', True),
         ]
 
-    def process_reservation(self, guest_name, guest_email, room_type, check_in, check_out, payment_method):
+        # Free rooms queued per type, so a lookup doesn't scan every room
+        self._free_by_type: Dict[str, Deque[Room]] = defaultdict(deque)
+        for room in self.rooms:
+            if room.is_available:
+                self._free_by_type[room.room_type].append(room)
+        # Reservations now interleave - one lock per room type guards assignment
+        self._room_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    async def process_reservation(self, guest_name, guest_email, room_type, check_in, check_out, payment_method):
         """
         Main reservation processing flow - MESSY!
         This is a monolithic function that does everything.
@@ -72,10 +82,9 @@ class HotelReservationSystem:
 
         # Check room availability - NO RETRY LOGIC
         print(f"Checking {room_type} room availability...")
-        time.sleep(0.5)
+        await asyncio.sleep(0.5)
 
-        available_rooms = [r for r in self.rooms
-                           if r.room_type == room_type and r.is_available]
+        available_rooms = self._free_by_type[room_type]
 
         if not available_rooms:
             raise Exception(f"No {room_type} rooms available for those dates")
@@ -89,7 +98,7 @@ class HotelReservationSystem:
         # Manual retry loop - should be handled by Temporal!
         for attempt in range(3):
             try:
-                time.sleep(0.5)
+                await asyncio.sleep(0.5)
 
                 # Simulate payment gateway failures (20% failure rate)
                 if random.random() < 0.2:
@@ -110,21 +119,26 @@ class HotelReservationSystem:
                 if attempt < 2:
                     wait_time = 2 ** attempt  # Exponential backoff
                     print(f"  Retrying in {wait_time}s...")
-                    time.sleep(wait_time)
+                    await asyncio.sleep(wait_time)
 
         if not payment_id:
             raise Exception("Payment failed after 3 attempts")
 
         # Assign room - JUST FAILS, NO RETRY
         print(f"Assigning {room_type} room...")
-        time.sleep(0.3)
+        async with self._room_locks[room_type]:
+            await asyncio.sleep(0.3)
+
+            # Simulate occasional assignment failures (15% failure rate)
+            if random.random() < 0.15:
+                raise Exception("Room assignment system error")
 
-        # Simulate occasional assignment failures (15% failure rate)
-        if random.random() < 0.15:
-            raise Exception("Room assignment system error")
+            # Another guest may have taken the last room while we were paying
+            if not available_rooms:
+                raise Exception(f"No {room_type} rooms available for those dates")
 
-        selected_room = available_rooms[0]
-        selected_room.is_available = False
+            selected_room = available_rooms.popleft()
+            selected_room.is_available = False
         room_number = selected_room.room_number
 
         print(f"✓ Room {room_number} assigned")
@@ -145,7 +159,7 @@ class HotelReservationSystem:
 
         # Send confirmation email - BASIC TRY/EXCEPT, NO RETRY
         print(f"Sending confirmation email to {guest_email}...")
-        time.sleep(0.4)
+        await asyncio.sleep(0.4)
 
         try:
             # Simulate email service failures (10% failure rate)
@@ -201,8 +215,7 @@ Thank you for choosing our hotel!
         }
 
 
-# Usage example
-if __name__ == "__main__":
+async def main():
     hotel = HotelReservationSystem()
 
     # Test reservations
@@ -233,14 +246,16 @@ if __name__ == "__main__":
         },
     ]
 
-    for reservation in reservations_to_process:
-        try:
-            result = hotel.process_reservation(**reservation)
+    # Process every reservation at once - the simulated I/O overlaps
+    results = await asyncio.gather(
+        *(hotel.process_reservation(**reservation) for reservation in reservations_to_process),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"Failed: {result}")
+        else:
             print(f"Success: {result['reservation_id']}")
-        except Exception as e:
-            print(f"Failed: {e}")
-
-        time.sleep(1)  # Pause between reservations
 
     print(f"\n\nFinal Summary:")
     print(f"Total reservations: {len(hotel.reservations)}")
@@ -249,4 +264,9 @@ if __name__ == "__main__":
     print(f"\nAvailable rooms remaining:")
     for room in hotel.rooms:
         if room.is_available:
-            print(f"  {room.room_number} ({room.room_type})")
\ No newline at end of file
+            print(f"  {room.room_number} ({room.room_type})")
+
+
+# Usage example
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,13 +2,13 @@
 from datetime import timedelta, datetime
 
 from temporalio.common import RetryPolicy
-from temporalio.exceptions import ApplicationError
-
-from database import ReservationRequest, ReservationResult, HotelData
+from temporalio.exceptions import ActivityError
 
 from temporalio import workflow
 
+# Passed through the sandbox so these modules load once per worker, not once per workflow run
 with workflow.unsafe.imports_passed_through():
+    from database import ReservationRequest, ReservationResult, ROOM_RATES
     from activities import (
         check_room_availability,
         collect_payment,
@@ -18,6 +18,8 @@ with workflow.unsafe.imports_passed_through():
         front_desk_confirmation
     )
 
+_BANNER = "=" * 70
+
 DEFAULT_RETRY_POLICY = RetryPolicy(
     maximum_attempts=3,
     initial_interval=timedelta(seconds=1),
@@ -25,6 +27,16 @@ DEFAULT_RETRY_POLICY = RetryPolicy(
     backoff_coefficient=2.0,
 )
 
+# Short, capped backoff for flaky external services - retries land quickly and never grow into minutes
+TRANSIENT_RETRY = RetryPolicy(
+    initial_interval=timedelta(milliseconds=200),
+    maximum_interval=timedelta(seconds=5),
+    backoff_coefficient=2.0,
+    maximum_attempts=5,
+    # Bad input won't succeed on a second try
+    non_retryable_error_types=["ValueError", "ValidationError"],
+)
+
 @workflow.defn
 class HotelReservationWorkflow:
 
@@ -34,48 +46,51 @@ class HotelReservationWorkflow:
         Main reservation processing flow - MESSY!
         This is a monolithic function that does everything.
         """
-        workflow.logger.info(f"\n{'=' * 70}")
-        workflow.logger.info(f"Processing reservation for {res.guest_name}")
-        workflow.logger.info(f"Room type: {res.room_type}")
-        workflow.logger.info(f"Check-in: {res.check_in}, Check-out: {res.check_out}")
-        workflow.logger.info(f"{'=' * 70}\n")
+        workflow.logger.debug("%s", _BANNER)
+        workflow.logger.info("Processing reservation for %s", res.guest_name)
+        workflow.logger.info("Room type: %s", res.room_type)
+        workflow.logger.info("Check-in: %s, Check-out: %s", res.check_in, res.check_out)
+        workflow.logger.debug("%s", _BANNER)
 
         # Not sure if the "calculate_nights" piece should be a different method call
         reservation_id = self.generate_reservation_id(res)
         nights = self.validate_res_request(res)
-        workflow.logger.info(f"Calculating price for {nights} night(s)...")
+        workflow.logger.info("Calculating price for %s night(s)...", nights)
 
         # Check room availability before calculating price
-        workflow.logger.info(f"Checking {res.room_type} room availability...")
-        available_rooms = await workflow.execute_activity(
+        workflow.logger.info("Checking %s room availability...", res.room_type)
+        # In-process lookup on the same worker - run it as a local activity to skip the task queue round-trip
+        available_rooms = await workflow.execute_local_activity(
             check_room_availability,
             args=[res],
-            start_to_close_timeout=timedelta(seconds=30),
+            start_to_close_timeout=timedelta(seconds=5),
             retry_policy=DEFAULT_RETRY_POLICY,
         )
-        workflow.logger.info(f"✓ Found {len(available_rooms)} available {res.room_type} room(s)")
+        workflow.logger.info("✓ Found %s available %s room(s)", len(available_rooms), res.room_type)
 
         total_price = self.calculate_total_price(res.room_type, nights)
-        workflow.logger.info(f"Total price: ${total_price:.2f}")
+        workflow.logger.info("Total price: $%.2f", total_price)
 
         payment_id = await workflow.execute_activity(
             collect_payment,
             args=[total_price],
             start_to_close_timeout=timedelta(seconds=30),
-            retry_policy=DEFAULT_RETRY_POLICY,
+            # Give up on the payment after 30s in total, retries included
+            schedule_to_close_timeout=timedelta(seconds=30),
+            retry_policy=TRANSIENT_RETRY,
         )
-        workflow.logger.info(f"✓ Payment processed: {payment_id}")
+        workflow.logger.info("✓ Payment processed: %s", payment_id)
 
         # Assign room - JUST FAILS, NO RETRY
-        workflow.logger.info(f"Assigning {res.room_type} room...")
+        workflow.logger.info("Assigning %s room...", res.room_type)
 
         room_number = await workflow.execute_activity(
             assign_room,
-            args=[available_rooms],
+            args=[res.room_type],
             start_to_close_timeout=timedelta(seconds=30),
             retry_policy=DEFAULT_RETRY_POLICY,
         )
-        workflow.logger.info(f"✓ Room {room_number} assigned")
+        workflow.logger.info("✓ Room %s assigned", room_number)
 
         res_result = ReservationResult(
             success=True,
@@ -87,46 +102,30 @@ class HotelReservationWorkflow:
             error=None
         )
 
-        # Send confirmation email - BASIC TRY/EXCEPT, NO RETRY
-        workflow.logger.info(f"Sending confirmation email to {res.guest_email}...")
-
-        try:
-            await workflow.execute_activity(
-                send_email_notification,
-                args=[res, res_result],
-                start_to_close_timeout=timedelta(seconds=10),
-                retry_policy=DEFAULT_RETRY_POLICY,
-            )
-
-        except ApplicationError as e:
-            workflow.logger.warn(f"⚠ Warning: Email failed - {e}")
-            workflow.logger.warn(f"⚠ Payment succeeded and room assigned, but customer wasn't notified!")
-            workflow.logger.warn(f"⚠ Sending SMS as a fallback")
-
+        # Reach the guest on the first channel that works: email, then SMS, then a
+        # call from the front desk. Each channel is its own activity with the short
+        # transient retry policy, so the server owns the retries
+        workflow.logger.info("Sending confirmation to %s...", res.guest_name)
+        for notification in (send_email_notification, send_sms_notification, front_desk_confirmation):
             try:
                 await workflow.execute_activity(
-                    send_sms_notification,
+                    notification,
                     args=[res, res_result],
                     start_to_close_timeout=timedelta(seconds=10),
-                    retry_policy=DEFAULT_RETRY_POLICY,
+                    retry_policy=TRANSIENT_RETRY,
                 )
-            except ApplicationError as e:
-                workflow.logger.warn(f"⚠ Warning: SMS failed - {e}")
-                workflow.logger.warn(f"⚠ Alerting front desk staff to notify manually - {e}")
-                await workflow.execute_activity(
-                    front_desk_confirmation,
-                    args=[res, res_result],
-                    start_to_close_timeout=timedelta(seconds=10),
-                    retry_policy=DEFAULT_RETRY_POLICY,
-                )
-
-        workflow.logger.info(f"\n{'=' * 70}")
-        workflow.logger.info(f"✓ Reservation {reservation_id} completed")
-        workflow.logger.info(f"  Guest: {res.guest_name}")
-        workflow.logger.info(f"  Room: {res_result} ({res.room_type})")
-        workflow.logger.info(f"  Nights: {nights}")
-        workflow.logger.info(f"  Total: ${total_price:.2f}")
-        workflow.logger.info(f"{'=' * 70}\n")
+                workflow.logger.info("✓ Guest notified via %s", notification.__name__)
+                break
+            except ActivityError as e:
+                workflow.logger.warning("⚠ Warning: %s failed - %s", notification.__name__, e.cause)
+
+        workflow.logger.debug("%s", _BANNER)
+        workflow.logger.info("✓ Reservation %s completed", reservation_id)
+        workflow.logger.info("  Guest: %s", res.guest_name)
+        workflow.logger.info("  Room: %s (%s)", room_number, res.room_type)
+        workflow.logger.info("  Nights: %s", nights)
+        workflow.logger.info("  Total: $%.2f", total_price)
+        workflow.logger.debug("%s", _BANNER)
 
         return res_result
 
@@ -148,14 +147,13 @@ class HotelReservationWorkflow:
 
     @staticmethod
     def calculate_total_price(room_type: str, nights: int) -> float:
-        hotel = HotelData()
-        base_price = hotel.rates.get(room_type, 100.00)
+        base_price = ROOM_RATES.get(room_type, 100.00)
         total_price = base_price * nights
 
         # Apply discount if staying 7+ nights
         if nights >= 7:
             total_price *= 0.9  # 10% discount
-            workflow.logger.info(f"Applied 7+ night discount: 10% off")
+            workflow.logger.info("Applied 7+ night discount: 10% off")
 
         return total_price
 
@@ -1,8 +1,9 @@
 # models.py - Simple data models for travel booking
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from datetime import date
 from typing import Optional
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TravelBooking:
     """Customer's travel booking request"""
     customer_name: str
@@ -12,9 +13,16 @@ class TravelBooking:
     departure_date: str  # ISO format: "2025-01-15"
     return_date: str
     num_passengers: int
+    # Derived from the dates once, so the hotel and car steps don't re-parse them
+    nights: int = field(init=False)
 
+    def __post_init__(self):
+        # Frozen, so the derived field is set past the frozen __setattr__
+        nights = (date.fromisoformat(self.return_date) - date.fromisoformat(self.departure_date)).days
+        object.__setattr__(self, "nights", nights)
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class FlightReservation:
     """Completed flight reservation"""
     reservation_id: str
@@ -26,7 +34,7 @@ class FlightReservation:
     price: float
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class HotelReservation:
     """Completed hotel reservation"""
     reservation_id: str
@@ -38,7 +46,7 @@ class HotelReservation:
     price: float
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CarReservation:
     """Completed car rental"""
     reservation_id: str
@@ -50,7 +58,7 @@ class CarReservation:
     price: float
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Payment:
     """Payment record"""
     payment_id: str
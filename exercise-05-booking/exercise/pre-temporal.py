@@ -1,9 +1,12 @@
 # pre-temporal.py - Travel booking WITHOUT compensations
 # This demonstrates the problem that SAGA pattern solves!
 
+import asyncio
+import contextvars
+import os
 import random
-import time
-from datetime import datetime
+import sys
+import uuid
 from models import (
     TravelBooking,
     FlightReservation,
@@ -12,28 +15,50 @@ from models import (
     Payment,
 )
 
+try:
+    import uvloop  # optional: a faster event loop when the demo fans out many bookings
+except ImportError:
+    uvloop = None
+
+# One generator for every simulated failure and random ID, instead of the shared
+# module-level one. Set RANDOM_SEED for reproducible runs.
+_rng = random.Random(os.getenv("RANDOM_SEED"))
+
 # "Database" - just in-memory dictionaries
 flight_reservations = {}
 hotel_reservations = {}
 car_reservations = {}
 payments = {}
 
+# Output of the booking in progress - written in one go when it finishes, so
+# concurrent bookings don't interleave their lines and each costs one write
+_booking_output = contextvars.ContextVar("booking_output", default=None)
+
 
-def book_flight(booking: TravelBooking, reservation_id: str) -> FlightReservation:
+def say(message: str = ""):
+    """Buffer a line for the current booking, or print it straight away outside one"""
+    output = _booking_output.get()
+    if output is None:
+        print(message)
+    else:
+        output.append(message)
+
+
+async def book_flight(booking: TravelBooking, reservation_id: str) -> FlightReservation:
     """
     Book a flight for the customer
 
     Simulates occasional failures (10% of the time)
     """
-    print(f"\n📍 Booking flight for {booking.customer_name}...")
-    print(f"   Route: {booking.departure_city} → {booking.destination_city}")
-    print(f"   Date: {booking.departure_date}")
+    say(f"\n📍 Booking flight for {booking.customer_name}...")
+    say(f"   Route: {booking.departure_city} → {booking.destination_city}")
+    say(f"   Date: {booking.departure_date}")
 
     # Simulate processing time
-    time.sleep(0.5)
+    await asyncio.sleep(0.5)
 
     # Simulate occasional failures
-    if random.random() < 0.10:
+    if _rng.random() < 0.10:
         raise Exception("❌ Flight booking service unavailable")
 
     # Calculate price
@@ -41,7 +66,7 @@ def book_flight(booking: TravelBooking, reservation_id: str) -> FlightReservatio
     price = base_price * booking.num_passengers
 
     # Create reservation
-    flight_number = f"AA{random.randint(100, 999)}"
+    flight_number = f"AA{_rng.randint(100, 999)}"
     reservation = FlightReservation(
         reservation_id=reservation_id,
         customer_name=booking.customer_name,
@@ -55,30 +80,27 @@ def book_flight(booking: TravelBooking, reservation_id: str) -> FlightReservatio
     # Store it
     flight_reservations[reservation_id] = reservation
 
-    print(f"   ✅ Flight {flight_number} booked (${price:.2f})")
+    say(f"   ✅ Flight {flight_number} booked (${price:.2f})")
     return reservation
 
 
-def book_hotel(booking: TravelBooking, reservation_id: str) -> HotelReservation:
+async def book_hotel(booking: TravelBooking, reservation_id: str) -> HotelReservation:
     """
     Book a hotel for the customer
 
     Simulates occasional failures (20% of the time)
     """
-    print(f"\n📍 Booking hotel in {booking.destination_city}...")
+    say(f"\n📍 Booking hotel in {booking.destination_city}...")
 
     # Simulate processing time
-    time.sleep(0.5)
+    await asyncio.sleep(0.5)
 
     # Simulate occasional failures
-    if random.random() < 0.20:
+    if _rng.random() < 0.20:
         raise Exception("❌ Hotel booking service unavailable")
 
     # Calculate price (per night)
-    from datetime import datetime
-    check_in = datetime.fromisoformat(booking.departure_date)
-    check_out = datetime.fromisoformat(booking.return_date)
-    nights = (check_out - check_in).days
+    nights = booking.nights
 
     rate_per_night = 150.00
     price = rate_per_night * nights
@@ -98,30 +120,27 @@ def book_hotel(booking: TravelBooking, reservation_id: str) -> HotelReservation:
     # Store it
     hotel_reservations[reservation_id] = reservation
 
-    print(f"   ✅ Hotel booked: {hotel_name} ({nights} nights, ${price:.2f})")
+    say(f"   ✅ Hotel booked: {hotel_name} ({nights} nights, ${price:.2f})")
     return reservation
 
 
-def book_car(booking: TravelBooking, reservation_id: str) -> CarReservation:
+async def book_car(booking: TravelBooking, reservation_id: str) -> CarReservation:
     """
     Book a rental car for the customer
 
     Simulates FREQUENT failures (40% of the time) - this is where things often break!
     """
-    print(f"\n📍 Booking rental car in {booking.destination_city}...")
+    say(f"\n📍 Booking rental car in {booking.destination_city}...")
 
     # Simulate processing time
-    time.sleep(0.5)
+    await asyncio.sleep(0.5)
 
     # Simulate FREQUENT failures - this is the problem step!
-    if random.random() < 0.40:
+    if _rng.random() < 0.40:
         raise Exception("❌ Car rental service unavailable")
 
     # Calculate price
-    from datetime import datetime
-    pickup = datetime.fromisoformat(booking.departure_date)
-    return_date = datetime.fromisoformat(booking.return_date)
-    days = (return_date - pickup).days
+    days = booking.nights
 
     rate_per_day = 50.00
     price = rate_per_day * days
@@ -141,27 +160,27 @@ def book_car(booking: TravelBooking, reservation_id: str) -> CarReservation:
     # Store it
     car_reservations[reservation_id] = reservation
 
-    print(f"   ✅ Car rental booked: {car_type} ({days} days, ${price:.2f})")
+    say(f"   ✅ Car rental booked: {car_type} ({days} days, ${price:.2f})")
     return reservation
 
 
-def process_payment(reservation_id: str, total_amount: float) -> Payment:
+async def process_payment(reservation_id: str, total_amount: float) -> Payment:
     """
     Process payment for the booking
 
     Simulates occasional failures (15% of the time)
     """
-    print(f"\n📍 Processing payment of ${total_amount:.2f}...")
+    say(f"\n📍 Processing payment of ${total_amount:.2f}...")
 
     # Simulate processing time
-    time.sleep(0.5)
+    await asyncio.sleep(0.5)
 
     # Simulate occasional failures
-    if random.random() < 0.15:
+    if _rng.random() < 0.15:
         raise Exception("❌ Payment processing failed")
 
     # Create payment record
-    payment_id = f"PAY-{random.randint(1000, 9999)}"
+    payment_id = f"PAY-{_rng.randint(1000, 9999)}"
     payment = Payment(
         payment_id=payment_id,
         reservation_id=reservation_id,
@@ -171,34 +190,55 @@ def process_payment(reservation_id: str, total_amount: float) -> Payment:
     # Store it
     payments[reservation_id] = payment
 
-    print(f"   ✅ Payment processed: {payment_id}")
+    say(f"   ✅ Payment processed: {payment_id}")
     return payment
 
 
-def send_confirmation_email(booking: TravelBooking, reservation_id: str):
+async def send_confirmation_email(booking: TravelBooking, reservation_id: str):
     """
     Send confirmation email to customer
 
     This can fail, but we don't care - booking is already complete!
     """
-    print(f"\n📍 Sending confirmation email to {booking.customer_email}...")
+    say(f"\n📍 Sending confirmation email to {booking.customer_email}...")
 
     # Simulate processing time
-    time.sleep(0.3)
+    await asyncio.sleep(0.3)
 
     # Email can fail 10% of the time - but this is OK!
-    if random.random() < 0.10:
-        print(f"   ⚠️  Email failed (but booking is still valid)")
+    if _rng.random() < 0.10:
+        say(f"   ⚠️  Email failed (but booking is still valid)")
         return
 
-    print(f"   ✅ Email sent")
+    say(f"   ✅ Email sent")
+
+
+# Emails still being sent - held so the background tasks aren't garbage collected
+pending_emails = set()
+
+
+async def _send_confirmation_email_task(booking: TravelBooking, reservation_id: str):
+    """Send the email with its own output buffer - the booking's was already written"""
+    output = []
+    _booking_output.set(output)  # a task runs in its own copy of the context
+    try:
+        await send_confirmation_email(booking, reservation_id)
+    finally:
+        sys.stdout.write("\n".join(output) + "\n")
+
+
+def send_confirmation_in_background(booking: TravelBooking, reservation_id: str):
+    """Send the confirmation email off the booking's critical path"""
+    task = asyncio.create_task(_send_confirmation_email_task(booking, reservation_id))
+    pending_emails.add(task)
+    task.add_done_callback(pending_emails.discard)
 
 
 # ========================================
 # THE PROBLEM: NO COMPENSATIONS!
 # ========================================
 
-def book_travel_package(booking: TravelBooking) -> str:
+async def book_travel_package(booking: TravelBooking) -> str:
     """
     Book a complete travel package: flight + hotel + car
 
@@ -207,13 +247,17 @@ def book_travel_package(booking: TravelBooking) -> str:
 
     This is what SAGA pattern / compensations solve.
     """
-    reservation_id = f"RES-{int(time.time())}-{random.randint(100, 999)}"
+    # Bookings run concurrently, so a timestamp plus 3 random digits could collide
+    reservation_id = f"RES-{uuid.uuid4().hex}"
+
+    output = []
+    output_token = _booking_output.set(output)
 
-    print("\n" + "=" * 70)
-    print(f"BOOKING TRAVEL PACKAGE")
-    print(f"Customer: {booking.customer_name}")
-    print(f"Reservation ID: {reservation_id}")
-    print("=" * 70)
+    say("\n" + "=" * 70)
+    say(f"BOOKING TRAVEL PACKAGE")
+    say(f"Customer: {booking.customer_name}")
+    say(f"Reservation ID: {reservation_id}")
+    say("=" * 70)
 
     flight_result = None
     hotel_result = None
@@ -221,28 +265,36 @@ def book_travel_package(booking: TravelBooking) -> str:
     payment_result = None
 
     try:
-        # Step 1: Book flight
-        flight_result = book_flight(booking, reservation_id)
-
-        # Step 2: Book hotel
-        hotel_result = book_hotel(booking, reservation_id)
-
-        # Step 3: Book car (this often fails!)
-        car_result = book_car(booking, reservation_id)
+        # Steps 1-3: flight, hotel and car don't depend on each other, so book
+        # them at the same time (the car often fails!)
+        results = await asyncio.gather(
+            book_flight(booking, reservation_id),
+            book_hotel(booking, reservation_id),
+            book_car(booking, reservation_id),
+            return_exceptions=True,
+        )
+        # Keep only the legs that actually booked so the failure report is accurate
+        flight_result, hotel_result, car_result = (
+            None if isinstance(result, Exception) else result for result in results
+        )
+        failure = next((result for result in results if isinstance(result, Exception)), None)
+        if failure is not None:
+            raise failure
 
         # Step 4: Process payment
         total = flight_result.price + hotel_result.price + car_result.price
-        payment_result = process_payment(reservation_id, total)
+        payment_result = await process_payment(reservation_id, total)
 
-        # Step 5: Send email (can fail, but we don't care)
-        send_confirmation_email(booking, reservation_id)
+        # Step 5: Send email in the background - it can fail and we don't care,
+        # so the customer shouldn't wait for it
+        send_confirmation_in_background(booking, reservation_id)
 
         # Success!
-        print("\n" + "=" * 70)
-        print("✅ TRAVEL PACKAGE BOOKED SUCCESSFULLY!")
-        print(f"Reservation ID: {reservation_id}")
-        print(f"Total: ${total:.2f}")
-        print("=" * 70 + "\n")
+        say("\n" + "=" * 70)
+        say("✅ TRAVEL PACKAGE BOOKED SUCCESSFULLY!")
+        say(f"Reservation ID: {reservation_id}")
+        say(f"Total: ${total:.2f}")
+        say("=" * 70 + "\n")
 
         return reservation_id
 
@@ -259,48 +311,54 @@ def book_travel_package(booking: TravelBooking) -> str:
         # - System is left in inconsistent state
         # ========================================
 
-        print("\n" + "=" * 70)
-        print(f"❌ BOOKING FAILED: {e}")
-        print("=" * 70)
+        say("\n" + "=" * 70)
+        say(f"❌ BOOKING FAILED: {e}")
+        say("=" * 70)
 
         # Just log what succeeded (but don't cancel anything!)
         if flight_result:
-            print(f"⚠️  WARNING: Flight {flight_result.flight_number} was booked but NOT cancelled!")
-            print("   Customer will be charged for unused flight!")
+            say(f"⚠️  WARNING: Flight {flight_result.flight_number} was booked but NOT cancelled!")
+            say("   Customer will be charged for unused flight!")
 
         if hotel_result:
-            print(f"⚠️  WARNING: Hotel {hotel_result.hotel_name} was booked but NOT cancelled!")
-            print("   Hotel will charge no-show fee!")
+            say(f"⚠️  WARNING: Hotel {hotel_result.hotel_name} was booked but NOT cancelled!")
+            say("   Hotel will charge no-show fee!")
 
         if car_result:
-            print(f"⚠️  WARNING: Car rental was booked but NOT cancelled!")
+            say(f"⚠️  WARNING: Car rental was booked but NOT cancelled!")
 
-        print("\n💡 This is what SAGA pattern / compensations solve!")
-        print("   We need to CANCEL these reservations when booking fails!")
-        print("=" * 70 + "\n")
+        say("\n💡 This is what SAGA pattern / compensations solve!")
+        say("   We need to CANCEL these reservations when booking fails!")
+        say("=" * 70 + "\n")
 
         raise
 
+    finally:
+        _booking_output.reset(output_token)
+        sys.stdout.write("\n".join(output) + "\n")
+
 
 def print_system_state():
     """Show the current state of all reservations"""
-    print("\n" + "=" * 70)
-    print("SYSTEM STATE (showing the problem)")
-    print("=" * 70)
-    print(f"Flight Reservations: {len(flight_reservations)}")
-    print(f"Hotel Reservations: {len(hotel_reservations)}")
-    print(f"Car Reservations: {len(car_reservations)}")
-    print(f"Payments Processed: {len(payments)}")
-    print("\n⚠️  If these numbers don't match, we have orphaned reservations!")
-    print("This is what proper compensations prevent.")
-    print("=" * 70 + "\n")
+    sys.stdout.write("\n".join([
+        "\n" + "=" * 70,
+        "SYSTEM STATE (showing the problem)",
+        "=" * 70,
+        f"Flight Reservations: {len(flight_reservations)}",
+        f"Hotel Reservations: {len(hotel_reservations)}",
+        f"Car Reservations: {len(car_reservations)}",
+        f"Payments Processed: {len(payments)}",
+        "\n⚠️  If these numbers don't match, we have orphaned reservations!",
+        "This is what proper compensations prevent.",
+        "=" * 70 + "\n",
+    ]) + "\n")
 
 
 # ========================================
 # DEMO: Run this to see the problem!
 # ========================================
 
-if __name__ == "__main__":
+async def main():
     print("🎯 DEMONSTRATING THE SAGA PROBLEM")
     print("(Run this a few times - car booking fails 40% of the time)\n")
 
@@ -334,28 +392,36 @@ if __name__ == "__main__":
         ),
     ]
 
-    # Try to book each travel package
-    for booking in bookings:
-        try:
-            book_travel_package(booking)
-        except Exception:
-            pass  # Already logged in the function
-
-        time.sleep(1)  # Pause between bookings
+    # Book every travel package at once - failures are already logged in the function
+    await asyncio.gather(
+        *(book_travel_package(booking) for booking in bookings),
+        return_exceptions=True,
+    )
+    # Let the background confirmation emails finish before reporting
+    await asyncio.gather(*pending_emails)
 
     # Show the problem!
     print_system_state()
 
-    print("\n" + "=" * 70)
-    print("THE PROBLEM:")
-    print("When bookings fail partway through, we have:")
-    print("• Orphaned flight reservations (customer charged but no trip)")
-    print("• Orphaned hotel reservations (hotel charges no-show fee)")
-    print("• Orphaned car reservations (rental company holds the car)")
-    print("\nTHE SOLUTION:")
-    print("Implement SAGA pattern with proper compensating actions:")
-    print("• cancel_flight()")
-    print("• cancel_hotel()")
-    print("• cancel_car()")
-    print("• refund_payment()")
-    print("=" * 70 + "\n")
\ No newline at end of file
+    sys.stdout.write("\n".join([
+        "\n" + "=" * 70,
+        "THE PROBLEM:",
+        "When bookings fail partway through, we have:",
+        "• Orphaned flight reservations (customer charged but no trip)",
+        "• Orphaned hotel reservations (hotel charges no-show fee)",
+        "• Orphaned car reservations (rental company holds the car)",
+        "\nTHE SOLUTION:",
+        "Implement SAGA pattern with proper compensating actions:",
+        "• cancel_flight()",
+        "• cancel_hotel()",
+        "• cancel_car()",
+        "• refund_payment()",
+        "=" * 70 + "\n",
+    ]) + "\n")
+
+
+if __name__ == "__main__":
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
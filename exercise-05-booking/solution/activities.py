@@ -1,5 +1,7 @@
+import base64
+import hashlib
+import os
 import random
-import uuid
 from datetime import datetime, timedelta
 
 from temporalio.exceptions import ApplicationError
@@ -7,6 +9,8 @@ from temporalio import activity
 
 from database import (
     get_booking_database,
+    parse_date,
+    date_range,
     FlightReservationRequest,
     HotelReservationRequest,
     CarReservationRequest,
@@ -14,19 +18,35 @@ from database import (
     CompletedHotelReservation,
     CompletedCarReservation,
     CompletedPayment, TravelBookingRequest,
+    BookingContext,
 )
 
+# Long stays are booked a month at a time, heartbeating after each chunk so a
+# retried attempt picks up where the last one stopped
+BOOKING_CHUNK_DAYS = 30
+
+# Simulated refund failure rate for the exercise; set REFUND_FAILURE_RATE=0 to
+# skip the random draw entirely
+REFUND_FAILURE_RATE = float(os.getenv("REFUND_FAILURE_RATE", "0.05"))
+
 
 # BOOKING ACTIVITIES
 @activity.defn
-async def store_booking_request(booking: TravelBookingRequest):
+async def store_booking_request(booking: TravelBookingRequest) -> BookingContext:
     db = get_booking_database()
     db.add_booking_request(booking.confirmation_code, booking)
 
+    # Hand the legs what they need so they don't each look the request up again
+    return BookingContext(
+        confirmation_code=booking.confirmation_code,
+        customer_name=booking.customer_name,
+        customer_email=booking.customer_email,
+        destination_city=booking.destination_city,
+    )
+
 @activity.defn
-async def book_flight(request: FlightReservationRequest) -> CompletedFlightReservation:
+async def book_flight(request: FlightReservationRequest, ctx: BookingContext) -> CompletedFlightReservation:
     db = get_booking_database()
-    booking_request = db.get_booking_request(request.confirmation_code)
 
     # Search for available flight
     result = db.find_available_flight(
@@ -37,14 +57,22 @@ async def book_flight(request: FlightReservationRequest) -> CompletedFlightReser
     )
 
     if not result:
-        raise ApplicationError(f"No available flights from {request.departure_city} to {request.destination_city}")
+        raise ApplicationError(
+            f"No available flights from {request.departure_city} to {request.destination_city}",
+            type="NoAvailability",
+            non_retryable=True,
+        )
 
     flight, instance, seat = result
 
     # Book the seat
     seat_success = db.book_seat(flight.flight_number, request.departure_date, seat.seat_number)
     if not seat_success:
-        raise ApplicationError(f"Unable to book seats on flight {flight.flight_number}")
+        raise ApplicationError(
+            f"Unable to book seats on flight {flight.flight_number}",
+            type="NoAvailability",
+            non_retryable=True,
+        )
 
     # Get pricing
     price = flight.price if flight else 350.00
@@ -52,8 +80,8 @@ async def book_flight(request: FlightReservationRequest) -> CompletedFlightReser
     # Create completed reservation
     completed_reservation = CompletedFlightReservation(
         confirmation_code=request.confirmation_code,
-        customer_name=booking_request.customer_name,
-        customer_email=booking_request.customer_email,
+        customer_name=ctx.customer_name,
+        customer_email=ctx.customer_email,
         flight_number=flight.flight_number,
         date=request.departure_date,
         seat_numbers=[seat.seat_number],
@@ -70,9 +98,8 @@ async def book_flight(request: FlightReservationRequest) -> CompletedFlightReser
 
 
 @activity.defn
-async def book_hotel(request: HotelReservationRequest) -> CompletedHotelReservation:
+async def book_hotel(request: HotelReservationRequest, ctx: BookingContext) -> CompletedHotelReservation:
     db = get_booking_database()
-    booking_request = db.get_booking_request(request.confirmation_code)
 
     # Bypass random failures for forced test scenarios
     if "FORCE-PAYMENT-FAIL" not in request.confirmation_code:
@@ -81,42 +108,51 @@ async def book_hotel(request: HotelReservationRequest) -> CompletedHotelReservat
             raise ApplicationError("Hotel booking service unavailable")
 
     # Get the destination city from booking request
-    city = booking_request.destination_city
+    city = ctx.destination_city
+
+    resume = activity.info().heartbeat_details
+    if resume:
+        # A previous attempt already booked part of the stay - finish it on the same room
+        hotel_name, room_number, booked_nights = resume
+        hotel = db.hotels_by_name[hotel_name]
+        room = hotel.rooms_by_number[room_number]
+    else:
+        # Search for available hotel room
+        result = db.find_available_hotel_room(
+            city=city,
+            room_type=request.room_type,
+            check_in=request.check_in,
+            check_out=request.check_out
+        )
 
-    # Search for available hotel room
-    result = db.find_available_hotel_room(
-        city=city,
-        room_type=request.room_type,
-        check_in=request.check_in,
-        check_out=request.check_out
-    )
+        if not result:
+            raise ApplicationError(
+                f"No available {request.room_type} rooms in {city}",
+                type="NoAvailability",
+                non_retryable=True,
+            )
 
-    if not result:
-        raise ApplicationError(f"No available {request.room_type} rooms in {city}")
+        hotel, room = result
+        booked_nights = 0
 
-    hotel, room = result
-
-    # Generate dates list for booking
-    in_date = datetime.fromisoformat(request.check_in)
-    out_date = datetime.fromisoformat(request.check_out)
-    dates = []
-    current = in_date
-    while current < out_date:
-        dates.append(current.strftime('%Y-%m-%d'))
-        current += timedelta(days=1)
+    # Nights come straight from the date difference - no need to build the list first
+    in_date = parse_date(request.check_in)
+    nights = (parse_date(request.check_out) - in_date).days
 
     # Book the room
-    room.book_dates(dates)
+    for done in range(booked_nights, nights, BOOKING_CHUNK_DAYS):
+        chunk = min(BOOKING_CHUNK_DAYS, nights - done)
+        room.book_dates_range(in_date + timedelta(days=done), chunk)
+        activity.heartbeat(hotel.hotel_name, room.room_number, done + chunk)
 
     # Calculate price
-    nights = len(dates)
     room_rate = hotel.rates.get(request.room_type, 100.00)
     total_price = room_rate * nights
 
     # Create completed reservation
     completed_reservation = CompletedHotelReservation(
         confirmation_code=request.confirmation_code,
-        customer_name=booking_request.customer_name,
+        customer_name=ctx.customer_name,
         hotel_name=hotel.hotel_name,
         room_number=room.room_number,
         room_type=request.room_type,
@@ -134,9 +170,8 @@ async def book_hotel(request: HotelReservationRequest) -> CompletedHotelReservat
 
 
 @activity.defn
-async def book_car(request: CarReservationRequest) -> CompletedCarReservation:
+async def book_car(request: CarReservationRequest, ctx: BookingContext) -> CompletedCarReservation:
     db = get_booking_database()
-    booking_request = db.get_booking_request(request.confirmation_code)
 
     # Bypass random failures for forced test scenarios
     if "FORCE-PAYMENT-FAIL" not in request.confirmation_code:
@@ -145,39 +180,47 @@ async def book_car(request: CarReservationRequest) -> CompletedCarReservation:
             raise ApplicationError("Car rental service unavailable")
 
     # Get the destination city from booking request
-    city = booking_request.destination_city
-
-    # Search for available car
-    car = db.find_available_car(
-        city=city,
-        car_type=request.car_type,
-        pickup_date=request.pickup_date,
-        return_date=request.return_date
-    )
+    city = ctx.destination_city
+
+    resume = activity.info().heartbeat_details
+    if resume:
+        # A previous attempt already booked part of the rental - finish it on the same car
+        license_plate, booked_days = resume
+        car = db.cars_by_plate[license_plate]
+    else:
+        # Search for available car
+        car = db.find_available_car(
+            city=city,
+            car_type=request.car_type,
+            pickup_date=request.pickup_date,
+            return_date=request.return_date
+        )
 
-    if not car:
-        raise ApplicationError(f"No available {request.car_type} cars in {city}")
+        if not car:
+            raise ApplicationError(
+                f"No available {request.car_type} cars in {city}",
+                type="NoAvailability",
+                non_retryable=True,
+            )
+        booked_days = 0
 
-    # Generate dates list for booking
-    pickup = datetime.fromisoformat(request.pickup_date)
-    return_date = datetime.fromisoformat(request.return_date)
-    dates = []
-    current = pickup
-    while current <= return_date:  # Include return date
-        dates.append(current.strftime('%Y-%m-%d'))
-        current += timedelta(days=1)
+    # Rental days come straight from the date difference
+    pickup = parse_date(request.pickup_date)
+    rental_days = (parse_date(request.return_date) - pickup).days + 1  # Include return date
 
     # Book the car
-    car.book_dates(dates)
+    for done in range(booked_days, rental_days, BOOKING_CHUNK_DAYS):
+        chunk = min(BOOKING_CHUNK_DAYS, rental_days - done)
+        car.book_dates_range(pickup + timedelta(days=done), chunk)
+        activity.heartbeat(car.license_plate, done + chunk)
 
     # Calculate price
-    rental_days = len(dates)
     total_price = car.daily_rate * rental_days
 
     # Create completed reservation
     completed_reservation = CompletedCarReservation(
         confirmation_code=request.confirmation_code,
-        customer_name=booking_request.customer_name,
+        customer_name=ctx.customer_name,
         license_plate=car.license_plate,
         car_type=request.car_type,
         pickup_date=request.pickup_date,
@@ -196,6 +239,14 @@ async def book_car(request: CarReservationRequest) -> CompletedCarReservation:
 @activity.defn
 async def accept_payment(confirmation_code: str, total_price: float) -> CompletedPayment:
     """Process payment for the total booking amount"""
+    db = get_booking_database()
+
+    # Same booking, same payment ID - a retry after a lost response can't charge twice
+    payment_id = f"PAY-{hashlib.blake2s(confirmation_code.encode(), digest_size=8).hexdigest()}"
+    existing = db.payments.get(payment_id)
+    if existing is not None:
+        activity.logger.info(f"✓ Payment already processed: {payment_id}")
+        return existing
 
     # Force failure for testing full compensation chain
     if "FORCE-PAYMENT-FAIL" in confirmation_code:
@@ -209,13 +260,11 @@ async def accept_payment(confirmation_code: str, total_price: float) -> Complete
     if random.random() < 0.15:
         raise ApplicationError("Payment service unavailable")
 
-    # Generate payment ID
-    payment_id = f"PAY-{uuid.uuid4().hex[:8]}"
-
     payment = CompletedPayment(
         id=payment_id,
         confirmation_code=confirmation_code
     )
+    db.payments[payment_id] = payment
 
     activity.logger.info(f"✓ Payment processed: {payment_id} for ${total_price:.2f}")
 
@@ -229,23 +278,26 @@ async def accept_payment(confirmation_code: str, total_price: float) -> Complete
 async def cancel_flight(confirmation_code: str) -> None:
     """Cancel a flight reservation and release the seat"""
     db = get_booking_database()
+    reservations = db.flight_reservations
 
     # Look up the reservation
-    reservation = db.flight_reservations.get(confirmation_code)
+    reservation = reservations.get(confirmation_code)
     if not reservation:
         activity.logger.warning(f"No flight reservation found for {confirmation_code}")
         return
 
     # Release the seat(s)
+    release_seat = db.release_seat
+    flight_number, date = reservation.flight_number, reservation.date
     for seat_number in reservation.seat_numbers:
-        db.release_seat(
-            flight_number=reservation.flight_number,
-            date=reservation.date,
+        release_seat(
+            flight_number=flight_number,
+            date=date,
             seat_number=seat_number
         )
 
     # Remove from database
-    del db.flight_reservations[confirmation_code]
+    del reservations[confirmation_code]
 
     activity.logger.info(f"✓ Flight cancelled: {reservation.flight_number} seats {reservation.seat_numbers}")
 
@@ -253,40 +305,33 @@ async def cancel_flight(confirmation_code: str) -> None:
 async def cancel_hotel(confirmation_code: str) -> None:
     """Cancel a hotel reservation and release the room"""
     db = get_booking_database()
+    reservations = db.hotel_reservations
 
     # Look up the reservation
-    reservation = db.hotel_reservations.get(confirmation_code)
+    reservation = reservations.get(confirmation_code)
     if not reservation:
         activity.logger.warning(f"No hotel reservation found for {confirmation_code}")
         return
 
     # Find the hotel and room
-    hotel = next((h for h in db.hotels if h.hotel_name == reservation.hotel_name), None)
+    hotel = db.hotels_by_name.get(reservation.hotel_name)
     if not hotel:
         activity.logger.warning(f"Hotel {reservation.hotel_name} not found")
         return
 
-    room = next((r for r in hotel.rooms if r.room_number == reservation.room_number), None)
+    room = hotel.rooms_by_number.get(reservation.room_number)
     if not room:
         activity.logger.warning(f"Room {reservation.room_number} not found")
         return
 
-    # Generate dates to release
-    in_date = datetime.fromisoformat(reservation.check_in)
-    out_date = datetime.fromisoformat(reservation.check_out)
-    dates = []
-    current = in_date
-    while current < out_date:
-        dates.append(current.strftime('%Y-%m-%d'))
-        current += timedelta(days=1)
+    # Dates to release
+    dates = date_range(reservation.check_in, reservation.check_out)
 
     # Release the dates
-    for date in dates:
-        if date in room.unavailable_dates:
-            room.unavailable_dates.remove(date)
+    room.unavailable_dates.difference_update(dates)
 
     # Remove from database
-    del db.hotel_reservations[confirmation_code]
+    del reservations[confirmation_code]
 
     activity.logger.info(f"✓ Hotel cancelled: Room {reservation.room_number} at {reservation.hotel_name}")
 
@@ -295,35 +340,28 @@ async def cancel_hotel(confirmation_code: str) -> None:
 async def cancel_car(confirmation_code: str) -> None:
     """Cancel a car rental and release the vehicle"""
     db = get_booking_database()
+    reservations = db.car_reservations
 
     # Look up the reservation
-    reservation = db.car_reservations.get(confirmation_code)
+    reservation = reservations.get(confirmation_code)
     if not reservation:
         activity.logger.warning(f"No car reservation found for {confirmation_code}")
         return
 
     # Find the car
-    car = next((c for c in db.cars if c.license_plate == reservation.license_plate), None)
+    car = db.cars_by_plate.get(reservation.license_plate)
     if not car:
         activity.logger.warning(f"Car {reservation.license_plate} not found")
         return
 
-    # Generate dates to release
-    pickup = datetime.fromisoformat(reservation.pickup_date)
-    return_date = datetime.fromisoformat(reservation.return_date)
-    dates = []
-    current = pickup
-    while current <= return_date:
-        dates.append(current.strftime('%Y-%m-%d'))
-        current += timedelta(days=1)
+    # Dates to release, including the return date
+    dates = date_range(reservation.pickup_date, reservation.return_date, inclusive=True)
 
     # Release the dates
-    for date in dates:
-        if date in car.unavailable_dates:
-            car.unavailable_dates.remove(date)
+    car.unavailable_dates.difference_update(dates)
 
     # Remove from database
-    del db.car_reservations[confirmation_code]
+    del reservations[confirmation_code]
 
     activity.logger.info(f"✓ Car rental cancelled: {car.make} {car.model} ({reservation.license_plate})")
 
@@ -333,9 +371,10 @@ async def refund_payment(confirmation_code: str) -> None:
     """Process refund for a cancelled booking"""
 
     # Simulate refund processing
-    if random.random() < 0.05:
+    if REFUND_FAILURE_RATE and random.random() < REFUND_FAILURE_RATE:
         raise ApplicationError("Refund processing failed")
 
-    refund_id = f"REF-{uuid.uuid4().hex[:8]}"
+    # 40 random bits encode to exactly 8 base32 characters - no UUID to build and slice
+    refund_id = "REF-" + base64.b32encode(os.urandom(5)).decode("ascii")
 
     activity.logger.info(f"✓ Payment refunded: {refund_id} for booking {confirmation_code}")
\ No newline at end of file
@@ -1,19 +1,42 @@
 # database.py - Updated with fixes and Airport class
-from dataclasses import dataclass
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import cache, lru_cache
+from datetime import date, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 from temporalio.exceptions import ApplicationError
 
 
-@dataclass
+
+@lru_cache(maxsize=4096)
+def parse_date(value: str) -> date:
+    """Parse an ISO date - bookings and their compensations re-parse the same few strings"""
+    return date.fromisoformat(value)
+
+
+def _iter_iso_dates(start: str, end: str, inclusive: bool = False) -> Iterator[str]:
+    """Yield ISO dates from start up to end (or through it when inclusive) without building a list"""
+    first = parse_date(start)
+    days = (parse_date(end) - first).days + (1 if inclusive else 0)
+    for i in range(days):
+        yield (first + timedelta(days=i)).isoformat()
+
+
+@lru_cache(maxsize=4096)
+def date_range(start: str, end: str, inclusive: bool = False) -> Tuple[str, ...]:
+    """ISO dates from start up to end (or through it when inclusive) - trips of the same shape share one tuple"""
+    return tuple(_iter_iso_dates(start, end, inclusive))
+
+
+@dataclass(slots=True)
 class Airport:
     code: str
     name: str
     city: str
 
 
-@dataclass
+@dataclass(slots=True)
 class TravelBookingRequest:
     confirmation_code: str  # System generated
     customer_name: str
@@ -29,8 +52,17 @@ class TravelBookingRequest:
     car_type: str = "economy"
 
 
+@dataclass(slots=True)
+class BookingContext:
+    """Customer details every booking leg needs - read once per booking"""
+    confirmation_code: str
+    customer_name: str
+    customer_email: str
+    destination_city: str
+
+
 # Flight template - flies this route every day
-@dataclass
+@dataclass(slots=True)
 class Flight:
     flight_number: str
     airline: str
@@ -41,7 +73,7 @@ class Flight:
     arrival_airport: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SeatInstance:
     """A specific seat on a specific flight instance"""
     seat_number: str
@@ -50,16 +82,42 @@ class SeatInstance:
     is_available: bool
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
+class PlaneLayout:
+    """Seat map for one airplane type - shared by every flight instance flown with it"""
+    airplane: str
+    seats_by_class: Dict[str, Tuple[str, ...]]  # seat numbers per class, in seat order
+    seat_slots: Dict[str, Tuple[str, int]]  # seat number -> (carriage class, its bit in that class's mask)
+
+
+@dataclass(slots=True)
 class FlightInstance:
     """An actual flight on a particular day"""
     flight_number: str
     date: str
-    seats: List[SeatInstance]
     airplane: str
+    layout: PlaneLayout = field(repr=False)
+    # Bit i of a class's mask is set while seat i of that class is free; seats only
+    # become SeatInstance objects when someone asks for them
+    class_masks: Dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.class_masks = {
+            carriage_class: (1 << len(numbers)) - 1
+            for carriage_class, numbers in self.layout.seats_by_class.items()
+        }
+
+    def available_seats(self, carriage_class: str) -> Iterator[SeatInstance]:
+        """Free seats in a class, in seat order"""
+        mask = self.class_masks.get(carriage_class, 0)
+        numbers = self.layout.seats_by_class.get(carriage_class, ())
+        while mask:
+            low = mask & -mask
+            yield SeatInstance(numbers[low.bit_length() - 1], carriage_class, self.date, True)
+            mask ^= low
 
 
-@dataclass
+@dataclass(slots=True)
 class FlightReservationRequest:
     confirmation_code: str
     carriage_class: str
@@ -69,7 +127,7 @@ class FlightReservationRequest:
     airline: Optional[str] = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class CompletedFlightReservation:
     """The actual booked flight reservation"""
     confirmation_code: str
@@ -83,24 +141,26 @@ class CompletedFlightReservation:
     booked_at: str  # timestamp
 
 
-@dataclass
+@dataclass(slots=True)
 class Room:
     room_number: str
     room_type: str
-    unavailable_dates: List[str]
+    unavailable_dates: Set[str]
 
-    def is_available(self, dates: List[str]) -> bool:
+    def is_available(self, dates: Iterable[str]) -> bool:
         """Check if room is available for all requested dates"""
-        return not any(date in self.unavailable_dates for date in dates)
+        return self.unavailable_dates.isdisjoint(dates)
 
-    def book_dates(self, dates: List[str]):
-        """Mark dates as unavailable"""
-        for date in dates:
-            if date not in self.unavailable_dates:
-                self.unavailable_dates.append(date)
+    def book_dates(self, dates: Iterable[str]) -> None:
+        """Mark dates as unavailable - one batched write instead of one per date"""
+        self.unavailable_dates.update(dates)
 
+    def book_dates_range(self, start: date, days: int) -> None:
+        """Mark `days` consecutive dates starting at `start` as unavailable"""
+        self.book_dates((start + timedelta(days=i)).isoformat() for i in range(days))
 
-@dataclass
+
+@dataclass(slots=True)
 class Hotel:
     hotel_name: str = ""
     hotel_id: str = ""
@@ -108,18 +168,20 @@ class Hotel:
     airport_code: str = ""
     rooms: List[Room] = None
     rates: Dict[str, float] = None
+    rooms_by_number: Dict[str, Room] = field(init=False, repr=False)
+    rooms_by_type: Dict[str, List[Room]] = field(init=False, repr=False)
 
-    def __post_init__(self):
+    def __post_init__(self) -> None:
         """Initialize default values if not provided"""
         if self.rooms is None:
             # Default rooms (for backward compatibility)
             self.rooms = [
-                Room('101', 'standard', []),
-                Room('102', 'standard', []),
-                Room('103', 'standard', []),
-                Room('201', 'deluxe', []),
-                Room('202', 'deluxe', []),
-                Room('301', 'suite', []),
+                Room('101', 'standard', set()),
+                Room('102', 'standard', set()),
+                Room('103', 'standard', set()),
+                Room('201', 'deluxe', set()),
+                Room('202', 'deluxe', set()),
+                Room('301', 'suite', set()),
             ]
 
         if self.rates is None:
@@ -129,6 +191,11 @@ class Hotel:
                 'suite': 250.00,
             }
 
+        self.rooms_by_number = {room.room_number: room for room in self.rooms}
+        self.rooms_by_type = defaultdict(list)
+        for room in self.rooms:
+            self.rooms_by_type[room.room_type].append(room)
+
     def book_room(self, room_type: str, dates: List[str]) -> str:
         """
         Book first available room of specified type
@@ -139,11 +206,14 @@ class Hotel:
         Raises:
             ApplicationError if no rooms available
         """
-        available_rooms = [r for r in self.rooms
-                           if r.room_type == room_type and r.is_available(dates)]
+        available_rooms = [r for r in self.rooms_by_type.get(room_type, ()) if r.is_available(dates)]
 
         if not available_rooms:
-            raise ApplicationError(f"No available {room_type} rooms for dates {dates}")
+            raise ApplicationError(
+                f"No available {room_type} rooms for dates {dates}",
+                type="NoAvailability",
+                non_retryable=True,
+            )
 
         # Book the first available room
         room = available_rooms[0]
@@ -151,7 +221,7 @@ class Hotel:
         return room.room_number
 
 
-@dataclass
+@dataclass(slots=True)
 class HotelReservationRequest:
     confirmation_code: str
     city: str
@@ -161,7 +231,7 @@ class HotelReservationRequest:
     check_out: str
 
 
-@dataclass
+@dataclass(slots=True)
 class CompletedHotelReservation:
     confirmation_code: str
     customer_name: str
@@ -174,34 +244,34 @@ class CompletedHotelReservation:
     booked_at: str
 
     def nights(self) -> int:
-        dep_date = datetime.fromisoformat(self.check_out)
-        ret_date = datetime.fromisoformat(self.check_in)
-        return (ret_date - dep_date).days
+        return (date.fromisoformat(self.check_out) - date.fromisoformat(self.check_in)).days
 
-@dataclass
+@dataclass(slots=True)
 class Car:
     license_plate: str
     make: str
     model: str
-    unavailable_dates: List[str]  # Dates when car is NOT available
+    unavailable_dates: Set[str]  # Dates when car is NOT available
 
     # Extra metadata (added by loader)
     car_type: str = ""
     location: str = ""
     daily_rate: float = 50.00
 
-    def is_available(self, dates: List[str]) -> bool:
+    def is_available(self, dates: Iterable[str]) -> bool:
         """Check if car is available for all requested dates"""
-        return not any(date in self.unavailable_dates for date in dates)
+        return self.unavailable_dates.isdisjoint(dates)
 
-    def book_dates(self, dates: List[str]):
-        """Mark dates as unavailable"""
-        for date in dates:
-            if date not in self.unavailable_dates:
-                self.unavailable_dates.append(date)
+    def book_dates(self, dates: Iterable[str]) -> None:
+        """Mark dates as unavailable - one batched write instead of one per date"""
+        self.unavailable_dates.update(dates)
 
+    def book_dates_range(self, start: date, days: int) -> None:
+        """Mark `days` consecutive dates starting at `start` as unavailable"""
+        self.book_dates((start + timedelta(days=i)).isoformat() for i in range(days))
 
-@dataclass
+
+@dataclass(slots=True)
 class CarReservationRequest:
     confirmation_code: str
     rental_company: str
@@ -210,7 +280,7 @@ class CarReservationRequest:
     return_date: str
 
 
-@dataclass
+@dataclass(slots=True)
 class CompletedCarReservation:
     confirmation_code: str
     customer_name: str
@@ -222,7 +292,7 @@ class CompletedCarReservation:
     booked_at: str
 
 
-@dataclass
+@dataclass(slots=True)
 class CompletedTravelBooking:
     """Master travel package with payment"""
     confirmation_code: str
@@ -234,13 +304,13 @@ class CompletedTravelBooking:
 
 
 ### Payment Stuff
-@dataclass
+@dataclass(slots=True)
 class PaymentRequest:
     confirmation_code: str
     price: float
 
 
-@dataclass
+@dataclass(slots=True)
 class CompletedPayment:
     id: str
     confirmation_code: str
@@ -249,13 +319,23 @@ class CompletedPayment:
 class BookingDatabase:
     """Central database for all travel bookings"""
 
-    def __init__(self):
+    def __init__(self) -> None:
         # Inventory
         self.airports: List[Airport] = []
+        # city -> airport code; rebuilt whenever the airport list is replaced
+        self._city_to_airport: Dict[str, str] = {}
         self.flights: List[Flight] = []
         self.flight_instances: List[FlightInstance] = []
+        # (flight_number, date) -> instance, so lookups don't scan every flight on every day
+        self.flight_instance_index: Dict[Tuple[str, str], FlightInstance] = {}
         self.hotels: List[Hotel] = []
         self.cars: List[Car] = []
+        # Inventory indexes, rebuilt after seeding so searches only visit candidates
+        self.flights_by_route: Dict[Tuple[str, str], List[Flight]] = defaultdict(list)
+        self.hotels_by_city: Dict[str, List[Hotel]] = defaultdict(list)
+        self.cars_by_location: Dict[str, List[Car]] = defaultdict(list)
+        self.hotels_by_name: Dict[str, Hotel] = {}
+        self.cars_by_plate: Dict[str, Car] = {}
 
         # Booking requests (original customer requests)
         self.booking_requests: Dict[str, TravelBookingRequest] = {}
@@ -265,10 +345,38 @@ class BookingDatabase:
         self.hotel_reservations: Dict[str, CompletedHotelReservation] = {}
         self.car_reservations: Dict[str, CompletedCarReservation] = {}
 
+        # Payments taken, keyed by payment_id so a retried charge can be spotted
+        self.payments: Dict[str, CompletedPayment] = {}
+
         # Master travel bookings (with payment_id)
         self.completed_bookings: Dict[str, CompletedTravelBooking] = {}
 
-    def add_booking_request(self, confirmation_code: str, request: TravelBookingRequest):
+    def _rebuild_airport_index(self) -> None:
+        """Refresh the city -> airport code map after loading airports"""
+        self._city_to_airport = {airport.city: airport.code for airport in self.airports}
+
+    def _rebuild_inventory_indexes(self) -> None:
+        """Group flights by route, hotels by city and cars by location; key hotels by name and cars by plate"""
+        self.flights_by_route = defaultdict(list)
+        for flight in self.flights:
+            self.flights_by_route[(flight.departure_airport, flight.arrival_airport)].append(flight)
+
+        self.hotels_by_city = defaultdict(list)
+        for hotel in self.hotels:
+            self.hotels_by_city[hotel.city].append(hotel)
+        self.hotels_by_name = {hotel.hotel_name: hotel for hotel in self.hotels}
+
+        self.cars_by_location = defaultdict(list)
+        for car in self.cars:
+            self.cars_by_location[car.location].append(car)
+        self.cars_by_plate = {car.license_plate: car for car in self.cars}
+
+    def add_flight_instance(self, instance: FlightInstance) -> None:
+        """Add a flight instance and index it by flight number and date"""
+        self.flight_instances.append(instance)
+        self.flight_instance_index[(instance.flight_number, instance.date)] = instance
+
+    def add_booking_request(self, confirmation_code: str, request: TravelBookingRequest) -> None:
         """Store the original booking request"""
         self.booking_requests[confirmation_code] = request
 
@@ -278,10 +386,7 @@ class BookingDatabase:
 
     def find_flight(self, flight_number: str, date: str) -> Optional[FlightInstance]:
         """Find a specific flight instance"""
-        for fi in self.flight_instances:
-            if fi.flight_number == flight_number and fi.date == date:
-                return fi
-        return None
+        return self.flight_instance_index.get((flight_number, date))
 
     def find_available_flight(
             self,
@@ -298,23 +403,14 @@ class BookingDatabase:
             or None if no matching flight found
         """
         # Map cities to airport codes
-        city_to_airport = {
-            airport.city: airport.code
-            for airport in self.airports
-        }
-
-        departure_airport = city_to_airport.get(departure_city)
-        arrival_airport = city_to_airport.get(destination_city)
+        departure_airport = self._city_to_airport.get(departure_city)
+        arrival_airport = self._city_to_airport.get(destination_city)
 
         if not departure_airport or not arrival_airport:
             return None  # City not found
 
         # Find flight templates matching route
-        matching_flights = [
-            f for f in self.flights
-            if f.departure_airport == departure_airport
-               and f.arrival_airport == arrival_airport
-        ]
+        matching_flights = self.flights_by_route.get((departure_airport, arrival_airport))
 
         if not matching_flights:
             return None  # No flights on this route
@@ -346,24 +442,18 @@ class BookingDatabase:
             Tuple of (Hotel, Room) or None if not found
         """
         # Find hotels in the city
-        matching_hotels = [h for h in self.hotels if h.city == city]
+        matching_hotels = self.hotels_by_city.get(city, ())
 
         if not matching_hotels:
             return None
 
-        # Generate list of dates needed
-        start = datetime.fromisoformat(check_in)
-        end = datetime.fromisoformat(check_out)
-        dates = []
-        current = start
-        while current < end:
-            dates.append(current.strftime('%Y-%m-%d'))
-            current += timedelta(days=1)
+        # Dates needed
+        dates = date_range(check_in, check_out)
 
-        # Check each hotel for available room
+        # Check each hotel's rooms of the requested type
         for hotel in matching_hotels:
-            for room in hotel.rooms:
-                if room.room_type == room_type and room.is_available(dates):
+            for room in hotel.rooms_by_type.get(room_type, ()):
+                if room.is_available(dates):
                     return hotel, room
 
         return None
@@ -382,26 +472,17 @@ class BookingDatabase:
             Car or None if not found
         """
         # Map city to airport code
-        city_to_airport = {airport.city: airport.code for airport in self.airports}
-        location = city_to_airport.get(city)
+        location = self._city_to_airport.get(city)
 
         if not location:
             return None
 
-        # Generate list of dates needed
-        start = datetime.fromisoformat(pickup_date)
-        end = datetime.fromisoformat(return_date)
-        dates = []
-        current = start
-        while current <= end:  # Include return date
-            dates.append(current.strftime('%Y-%m-%d'))
-            current += timedelta(days=1)
+        # Dates needed, including the return date
+        dates = date_range(pickup_date, return_date, inclusive=True)
 
         # Find available car at location
-        for car in self.cars:
-            if (car.location == location and
-                    car.car_type == car_type and
-                    car.is_available(dates)):
+        for car in self.cars_by_location.get(location, ()):
+            if car.car_type == car_type and car.is_available(dates):
                 return car
 
         return None
@@ -412,23 +493,16 @@ class BookingDatabase:
         if not instance:
             return []
 
-        return [s for s in instance.seats
-                if s.carriage_class == carriage_class and s.is_available]
+        return list(instance.available_seats(carriage_class))
 
     def find_hotel_by_city(self, city: str) -> Optional[Hotel]:
         """Find first hotel in a city"""
-        for hotel in self.hotels:
-            if hotel.city == city:
-                return hotel
-        return None
+        hotels = self.hotels_by_city.get(city)
+        return hotels[0] if hotels else None
 
     def get_flight_instance(self, flight_number: str, date: str) -> Optional[FlightInstance]:
         """Get specific flight instance by number and date"""
-        return next(
-            (fi for fi in self.flight_instances
-             if fi.flight_number == flight_number and fi.date == date),
-            None
-        )
+        return self.flight_instance_index.get((flight_number, date))
 
     def find_available_seat(
             self,
@@ -446,12 +520,8 @@ class BookingDatabase:
         if not instance:
             return None
 
-        # Find first available seat in the requested class
-        for seat in instance.seats:
-            if seat.carriage_class == carriage_class and seat.is_available:
-                return seat
-
-        return None
+        # First available seat in the requested class is the lowest set bit
+        return next(instance.available_seats(carriage_class), None)
 
     def book_seat(
             self,
@@ -469,14 +539,15 @@ class BookingDatabase:
         if not instance:
             return False
 
-        for seat in instance.seats:
-            if seat.seat_number == seat_number:
-                if not seat.is_available:
-                    return False  # Already booked
-                seat.is_available = False
-                return True
+        slot = instance.layout.seat_slots.get(seat_number)
+        if slot is None:
+            return False  # Seat not found
+        carriage_class, bit = slot
+        if not instance.class_masks[carriage_class] & bit:
+            return False  # Already booked
 
-        return False  # Seat not found
+        instance.class_masks[carriage_class] &= ~bit
+        return True
 
     def release_seat(
             self,
@@ -494,12 +565,13 @@ class BookingDatabase:
         if not instance:
             return False
 
-        for seat in instance.seats:
-            if seat.seat_number == seat_number:
-                seat.is_available = True
-                return True
+        slot = instance.layout.seat_slots.get(seat_number)
+        if slot is None:
+            return False  # Seat not found
 
-        return False  # Seat not found
+        carriage_class, bit = slot
+        instance.class_masks[carriage_class] |= bit
+        return True
 
     def get_available_seat_count(
             self,
@@ -516,23 +588,21 @@ class BookingDatabase:
         if not instance:
             return 0
 
-        return sum(
-            1 for seat in instance.seats
-            if seat.carriage_class == carriage_class and seat.is_available
-        )
-
-
-_global_db = None
+        return instance.class_masks.get(carriage_class, 0).bit_count()
 
 
+@cache
 def get_booking_database() -> BookingDatabase:
-    """Get or create the global booking database singleton"""
-    global _global_db
-    if _global_db is None:
-        from seed_data_loader import SeedDataLoader
-        _global_db = SeedDataLoader.initialize_database(
-            start_date="2025-01-20",
-            num_days=60
-        )
-        print("✓ Booking database initialized")
-    return _global_db
\ No newline at end of file
+    """Get the booking database singleton - loaded on first call, then served from the cache"""
+    from seed_data_loader import SeedDataLoader  # seed_data_loader imports this module
+    db = SeedDataLoader.initialize_database(
+        start_date="2025-01-20",
+        num_days=60
+    )
+    print("✓ Booking database initialized")
+    return db
+
+
+def init_booking_database() -> BookingDatabase:
+    """Load the seed data at worker startup so no activity pays for it"""
+    return get_booking_database()
@@ -2,23 +2,38 @@
 # Utility to load seed data from JSON into database objects
 
 import json
-from datetime import datetime, timedelta
-from typing import List
+import os
+import sys
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List
 from database import (
-    Flight, FlightInstance, SeatInstance,
+    Flight, FlightInstance, PlaneLayout,
     Hotel, Room, Car, Airport,
     BookingDatabase
 )
 
 
+@lru_cache(maxsize=4)
+def _read_seed_file(filepath: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse a seed file - keyed on its mtime too, so an edited file is re-read"""
+    with open(filepath, 'r') as f:
+        return json.load(f)
+
+
 class SeedDataLoader:
 
     @staticmethod
-    def load_airports(filepath: str = "travel-seed-data.json") -> List[Airport]:
-        """Load airports from JSON"""
-        with open(filepath, 'r') as f:
-            data = json.load(f)
+    def load_seed_data(filepath: str = "travel-seed-data.json") -> Dict[str, Any]:
+        """Parse the seed JSON - done once, then handed to each loader
+
+        The parsed dict is cached and shared between loads, so loaders must not modify it.
+        """
+        return _read_seed_file(filepath, os.stat(filepath).st_mtime_ns)
 
+    @staticmethod
+    def load_airports(data: Dict[str, Any]) -> List[Airport]:
+        """Load airports from JSON"""
         airports = []
         for a in data['airports']:
             airports.append(Airport(
@@ -29,11 +44,8 @@ class SeedDataLoader:
         return airports
 
     @staticmethod
-    def load_flights(filepath: str = "travel-seed-data.json") -> List[Flight]:
+    def load_flights(data: Dict[str, Any]) -> List[Flight]:
         """Load flight templates from JSON"""
-        with open(filepath, 'r') as f:
-            data = json.load(f)
-
         flights = []
         for f_data in data['flights']:
             # For each carriage class with a price, create price entry
@@ -50,12 +62,28 @@ class SeedDataLoader:
             flights.append(flight)
         return flights
 
+    @staticmethod
+    def build_plane_layout(airplane: str, seat_config: Dict[str, int]) -> PlaneLayout:
+        """Number the seats of one airplane type: 1F, 2F, ..., 9B, ... in class order"""
+        seats_by_class = {}
+        seat_slots = {}
+        seat_number = 1
+        for carriage_class, count in seat_config.items():
+            suffix = carriage_class[0].upper()
+            # Interned, so airplane types with the same numbering share the strings
+            numbers = tuple(sys.intern(f"{seat_number + ordinal}{suffix}") for ordinal in range(count))
+            for ordinal, number in enumerate(numbers):
+                seat_slots[number] = (carriage_class, 1 << ordinal)
+            seats_by_class[carriage_class] = numbers
+            seat_number += count
+        return PlaneLayout(airplane=airplane, seats_by_class=seats_by_class, seat_slots=seat_slots)
+
     @staticmethod
     def generate_flight_instances(
             flights: List[Flight],
             start_date: str,
-            num_days: int = 30,
-            filepath: str = "travel-seed-data.json"
+            data: Dict[str, Any],
+            num_days: int = 30
     ) -> List[FlightInstance]:
         """
         Generate FlightInstance objects for each flight for the next N days
@@ -63,17 +91,18 @@ class SeedDataLoader:
         Args:
             flights: List of Flight templates
             start_date: Starting date in ISO format "2025-01-15"
+            data: Parsed seed data, for the airplane seat configs
             num_days: Number of days to generate instances for
-            filepath: Path to seed data for airplane configs
         """
-        with open(filepath, 'r') as f:
-            data = json.load(f)
-
         seat_configs = data['airplane_seat_configs']
         flight_data_map = {f['flight_number']: f for f in data['flights']}
 
         instances = []
-        base_date = datetime.fromisoformat(start_date)
+        base_date = date.fromisoformat(start_date)
+        # Every flight flies the same days - format them once, not once per flight
+        dates = [(base_date + timedelta(days=day)).isoformat() for day in range(num_days)]
+        # One seat map per airplane type, shared by every instance that flies it
+        layouts: Dict[str, PlaneLayout] = {}
 
         for flight in flights:
             flight_info = flight_data_map.get(flight.flight_number)
@@ -81,43 +110,27 @@ class SeedDataLoader:
                 continue
 
             airplane = flight_info['airplane']
-            seat_config = seat_configs.get(airplane, {})
+            layout = layouts.get(airplane)
+            if layout is None:
+                layout = layouts[airplane] = SeedDataLoader.build_plane_layout(
+                    airplane, seat_configs.get(airplane, {})
+                )
 
             # Generate instance for each day
-            for day in range(num_days):
-                instance_date = (base_date + timedelta(days=day)).strftime('%Y-%m-%d')
-
-                # Generate seats for this instance
-                seats = []
-                seat_number = 1
-
-                for carriage_class, count in seat_config.items():
-                    for _ in range(count):
-                        seat = SeatInstance(
-                            seat_number=f"{seat_number}{carriage_class[0].upper()}",
-                            carriage_class=carriage_class,
-                            date=instance_date,
-                            is_available=True
-                        )
-                        seats.append(seat)
-                        seat_number += 1
-
+            for instance_date in dates:
                 instance = FlightInstance(
                     flight_number=flight.flight_number,
                     date=instance_date,
-                    seats=seats,
-                    airplane=airplane
+                    airplane=airplane,
+                    layout=layout,
                 )
                 instances.append(instance)
 
         return instances
 
     @staticmethod
-    def load_hotels(filepath: str = "travel-seed-data.json") -> List[Hotel]:
+    def load_hotels(data: Dict[str, Any]) -> List[Hotel]:
         """Load hotels from JSON"""
-        with open(filepath, 'r') as f:
-            data = json.load(f)
-
         hotels = []
         for h_data in data['hotels']:
             # Create Room objects
@@ -126,32 +139,27 @@ class SeedDataLoader:
                 room = Room(
                     room_number=r['room_number'],
                     room_type=r['room_type'],
-                    unavailable_dates=[]  # Start with all dates available
+                    unavailable_dates=set()  # Start with all dates available
                 )
                 rooms.append(room)
 
-            # Create Hotel (note: your Hotel.__init__ creates default rooms)
-            # We'll need to fix this - hotels should accept rooms in constructor
-            hotel = Hotel()
-            hotel.hotel_name = h_data['hotel_name']
-            hotel.rooms = rooms
-            hotel.rates = h_data['rates']
-
-            # Add extra metadata
-            hotel.hotel_id = h_data['hotel_id']
-            hotel.city = h_data['city']
-            hotel.airport_code = h_data['airport_code']
+            # Pass the rooms in so Hotel indexes these, not its default rooms
+            hotel = Hotel(
+                hotel_name=h_data['hotel_name'],
+                hotel_id=h_data['hotel_id'],
+                city=h_data['city'],
+                airport_code=h_data['airport_code'],
+                rooms=rooms,
+                rates=dict(h_data['rates']),  # own copy - the parsed seed data is shared
+            )
 
             hotels.append(hotel)
 
         return hotels
 
     @staticmethod
-    def load_cars(filepath: str = "travel-seed-data.json") -> List[Car]:
+    def load_cars(data: Dict[str, Any]) -> List[Car]:
         """Load car inventory from JSON"""
-        with open(filepath, 'r') as f:
-            data = json.load(f)
-
         cars = []
         car_types = {ct['type_name']: ct for ct in data['car_types']}
 
@@ -162,7 +170,7 @@ class SeedDataLoader:
                 license_plate=c_data['license_plate'],
                 make=car_type_info.get('make', 'Unknown'),
                 model=car_type_info.get('model', 'Unknown'),
-                unavailable_dates=[]
+                unavailable_dates=set()
             )
             # Add extra metadata
             car.car_type = c_data['car_type']
@@ -192,14 +200,18 @@ class SeedDataLoader:
         """
         db = BookingDatabase()
 
-        # Load all data
-        db.airports = SeedDataLoader.load_airports(filepath)
-        db.flights = SeedDataLoader.load_flights(filepath)
-        db.flight_instances = SeedDataLoader.generate_flight_instances(
-            db.flights, start_date, num_days, filepath
-        )
-        db.hotels = SeedDataLoader.load_hotels(filepath)
-        db.cars = SeedDataLoader.load_cars(filepath)
+        # Parse the seed file once and load everything from it
+        data = SeedDataLoader.load_seed_data(filepath)
+        db.airports = SeedDataLoader.load_airports(data)
+        db._rebuild_airport_index()
+        db.flights = SeedDataLoader.load_flights(data)
+        for instance in SeedDataLoader.generate_flight_instances(
+                db.flights, start_date, data, num_days
+        ):
+            db.add_flight_instance(instance)
+        db.hotels = SeedDataLoader.load_hotels(data)
+        db.cars = SeedDataLoader.load_cars(data)
+        db._rebuild_inventory_indexes()
 
         print(f"Database initialized with:")
         print(f"  {len(db.airports)} airports")
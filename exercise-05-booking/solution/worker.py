@@ -2,7 +2,8 @@ import asyncio
 
 from temporalio.worker import Worker
 from temporalio.client import Client
-from workflow import BookingWorkflow
+from workflow import BookingWorkflow, FLIGHT_TASK_QUEUE
+from database import init_booking_database
 from activities import (
     store_booking_request,
     book_flight,
@@ -15,16 +16,26 @@ from activities import (
 )
 
 async def main():
+    # Load seed data up front so the first activity doesn't pay for it
+    init_booking_database()
+
     client = await Client.connect("localhost:7233")
 
     worker = Worker(
         client,
         workflows=[BookingWorkflow],
         task_queue="booking-queue",
-        activities=[store_booking_request,book_flight,book_car,book_hotel,accept_payment,cancel_flight,cancel_car,cancel_hotel],
+        activities=[store_booking_request,book_car,book_hotel,accept_payment,cancel_car,cancel_hotel],
+    )
+
+    # Deploy this one close to the flight system - only flight calls cross to it
+    flight_worker = Worker(
+        client,
+        task_queue=FLIGHT_TASK_QUEUE,
+        activities=[book_flight,cancel_flight],
     )
 
-    await worker.run()
+    await asyncio.gather(worker.run(), flight_worker.run())
 
 if __name__ == "__main__":
     asyncio.run(main())
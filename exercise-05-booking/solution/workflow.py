@@ -1,3 +1,5 @@
+import asyncio
+
 from temporalio import workflow
 from temporalio.common import RetryPolicy
 from temporalio.exceptions import ActivityError
@@ -5,11 +7,17 @@ from temporalio.exceptions import ActivityError
 from database import FlightReservationRequest, HotelReservationRequest, CarReservationRequest, TravelBookingRequest
 from datetime import timedelta
 
+# Flight activities run on their own queue so that worker can live next to the flight system
+FLIGHT_TASK_QUEUE = "flight-queue"
+
 DEFAULT_RETRY_POLICY = RetryPolicy(
     maximum_attempts=3,
     initial_interval=timedelta(seconds=1),
     maximum_interval=timedelta(seconds=10),
     backoff_coefficient=2.0,
+    # Sold out is an answer, not a fault - retrying won't free up a seat, room or car.
+    # Coding bugs fail the same way on every attempt, so fail them fast too
+    non_retryable_error_types=["NoAvailability", "NameError", "AttributeError"],
 )
 
 with workflow.unsafe.imports_passed_through():
@@ -44,15 +52,15 @@ class BookingWorkflow:
 
         try:
             workflow.logger.info(f"Persisting booking request: Confirmation code: {confirmation_code}")
-            await workflow.execute_activity(
+            ctx = await workflow.execute_activity(
                 store_booking_request,
                 args=[booking],
                 start_to_close_timeout=timedelta(minutes=5),
                 retry_policy=DEFAULT_RETRY_POLICY
             )
 
-            # Step 1: Book Flight
-            workflow.logger.info("Step 1: Booking flight...")
+            # Steps 1-3: Book flight, hotel and rental car - the legs don't depend on each other
+            workflow.logger.info("Steps 1-3: Booking flight, hotel and rental car...")
             flight_request = FlightReservationRequest(
                 confirmation_code=confirmation_code,
                 carriage_class=booking.carriage_class,
@@ -61,19 +69,6 @@ class BookingWorkflow:
                 departure_city=booking.departure_city,
                 destination_city=booking.destination_city,
             )
-
-            flight_result = await workflow.execute_activity(
-                book_flight,
-                args=[flight_request],
-                start_to_close_timeout=timedelta(minutes=5),
-                retry_policy=DEFAULT_RETRY_POLICY
-            )
-            workflow.logger.info(f"✓ Flight booked: {confirmation_code}")
-            workflow.logger.info(f"  Price: ${flight_result.price:.2f}")
-
-            # Step 2: Book Hotel
-            workflow.logger.info("\nStep 2: Booking hotel...")
-
             hotel_request = HotelReservationRequest(
                 confirmation_code=confirmation_code,
                 city=booking.destination_city,
@@ -82,18 +77,6 @@ class BookingWorkflow:
                 check_in=booking.departure_date,
                 check_out=booking.return_date
             )
-
-            hotel_result = await workflow.execute_activity(
-                book_hotel,
-                args=[hotel_request],
-                start_to_close_timeout=timedelta(minutes=5),
-                retry_policy=DEFAULT_RETRY_POLICY
-            )
-            workflow.logger.info(f"✓ Hotel booked: {confirmation_code}")
-            workflow.logger.info(f"  {hotel_result.nights()} nights at ${hotel_result.price:.2f}")
-
-            # Step 3: Book Rental Car
-            workflow.logger.info("\nStep 3: Booking rental car...")
             car_request = CarReservationRequest(
                 confirmation_code=confirmation_code,
                 rental_company="Enterprise",
@@ -102,13 +85,44 @@ class BookingWorkflow:
                 return_date=booking.return_date
             )
 
-            car_result = await workflow.execute_activity(
-                book_car,
-                args=[car_request],
-                start_to_close_timeout=timedelta(minutes=5),
-                retry_policy=DEFAULT_RETRY_POLICY
+            # Wait for every leg (even after one fails) so we know exactly which ones to roll back
+            flight_result, hotel_result, car_result = await asyncio.gather(
+                workflow.execute_activity(
+                    book_flight,
+                    args=[flight_request, ctx],
+                    task_queue=FLIGHT_TASK_QUEUE,
+                    start_to_close_timeout=timedelta(minutes=5),
+                    retry_policy=DEFAULT_RETRY_POLICY
+                ),
+                workflow.execute_activity(
+                    book_hotel,
+                    args=[hotel_request, ctx],
+                    start_to_close_timeout=timedelta(minutes=5),
+                    heartbeat_timeout=timedelta(seconds=30),
+                    retry_policy=DEFAULT_RETRY_POLICY
+                ),
+                workflow.execute_activity(
+                    book_car,
+                    args=[car_request, ctx],
+                    start_to_close_timeout=timedelta(minutes=5),
+                    heartbeat_timeout=timedelta(seconds=30),
+                    retry_policy=DEFAULT_RETRY_POLICY
+                ),
+                return_exceptions=True,
             )
 
+            failures = [r for r in (flight_result, hotel_result, car_result) if isinstance(r, BaseException)]
+            if failures:
+                # Only the legs that actually booked get compensated below
+                flight_result = None if isinstance(flight_result, BaseException) else flight_result
+                hotel_result = None if isinstance(hotel_result, BaseException) else hotel_result
+                car_result = None if isinstance(car_result, BaseException) else car_result
+                raise failures[0]
+
+            workflow.logger.info(f"✓ Flight booked: {confirmation_code}")
+            workflow.logger.info(f"  Price: ${flight_result.price:.2f}")
+            workflow.logger.info(f"✓ Hotel booked: {confirmation_code}")
+            workflow.logger.info(f"  {hotel_result.nights()} nights at ${hotel_result.price:.2f}")
             workflow.logger.info(f"✓ Car rental booked: {confirmation_code}")
             workflow.logger.info(f"  ${car_result.price:.2f}")
 
@@ -137,28 +151,33 @@ class BookingWorkflow:
             workflow.logger.error(f"Booking failed: {e.cause}")
             workflow.logger.info("Rolling back reservations...")
 
+            # Each leg's cancellation touches its own records, so undo them all at once
+            compensations = []
             if car_result:
-                await workflow.execute_activity(
+                compensations.append(workflow.execute_activity(
                     cancel_car,
                     args=[confirmation_code],
                     start_to_close_timeout=timedelta(seconds=5),
                     retry_policy=DEFAULT_RETRY_POLICY
-                )
+                ))
 
             if hotel_result:
-                await workflow.execute_activity(
+                compensations.append(workflow.execute_activity(
                     cancel_hotel,
                     args=[confirmation_code],
                     start_to_close_timeout=timedelta(seconds=5),
                     retry_policy=DEFAULT_RETRY_POLICY
-                )
+                ))
 
             if flight_result:
-                await workflow.execute_activity(
+                compensations.append(workflow.execute_activity(
                     cancel_flight,
                     args=[confirmation_code],
+                    task_queue=FLIGHT_TASK_QUEUE,
                     start_to_close_timeout=timedelta(seconds=5),
                     retry_policy=DEFAULT_RETRY_POLICY
-                )
+                ))
+
+            await asyncio.gather(*compensations)
 
             raise
\ No newline at end of file